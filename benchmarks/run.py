@@ -0,0 +1,220 @@
+"""Cenários cronometrados do pipeline: coleta contra o stub local, combine_csvs, table.py e
+cada script de graficos/, com tempo, vazão (linhas/s) e pico de memória (RSS) de cada um.
+
+Cada cenário roda num subprocesso próprio (os.wait4 dá o pico de RSS só daquele processo
+e dos seus filhos que ele esperou). Os dados sintéticos ficam em --work-dir e são
+reaproveitados entre execuções com o mesmo tamanho. Com um baseline salvo
+(--save-baseline), cada execução aponta as regressões acima de --tolerance e termina
+com código 1 se houver alguma.
+
+Uso:
+    python benchmarks/run.py --rows 1e6 --save-baseline
+    python benchmarks/run.py --rows 1e6 --only table,heatmap
+    python benchmarks/run.py --only collect --repos 30 --latency 100 --error-rate 0.02
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+CODE_DIR = os.path.join(ROOT, 'códigos')
+PLOTS_DIR = os.path.join(ROOT, 'graficos')
+
+# --- CONFIGURAÇÕES ---
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_WORK_DIR = os.path.join(ROOT, '.bench')
+PLOT_SCRIPTS = sorted([os.path.basename(p)[:-3] for p in glob.glob(os.path.join(PLOTS_DIR, 'RQ*.py'))]
+                      + ['heatmap', 'report'])
+SCENARIOS = ['collect', 'combine', 'table'] + PLOT_SCRIPTS
+# Métricas comparadas com o baseline (maior = pior)
+COMPARED = ('seconds', 'max_rss_mb')
+
+
+def _rss_mb(rusage):
+    # ru_maxrss é em KiB no Linux e em bytes no macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return rusage.ru_maxrss * scale / 2**20
+
+
+def measure(command, cwd, env=None, log_name='log.txt'):
+    """Roda `command` e devolve (segundos, pico de RSS em MiB, código de saída)."""
+    os.makedirs(cwd, exist_ok=True)
+    with open(os.path.join(cwd, log_name), 'w', encoding='utf-8') as log:
+        started = time.perf_counter()
+        process = subprocess.Popen(command, cwd=cwd, env={**os.environ, **(env or {})},
+                                   stdout=log, stderr=subprocess.STDOUT)
+        _, status, rusage = os.wait4(process.pid, 0)
+        seconds = time.perf_counter() - started
+    return seconds, _rss_mb(rusage), os.waitstatus_to_exitcode(status)
+
+
+def count_rows(path):
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    with open(path, 'rb') as f:
+        return max(0, sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 20), b'')) - 1)
+
+
+# --- DADOS SINTÉTICOS ---
+
+# Gerados num subprocesso: o ru_maxrss de um processo filho parte do pico do pai no fork,
+# então o processo que mede precisa continuar pequeno
+
+def _generate(rows, option, path):
+    subprocess.run([sys.executable, os.path.join(BENCH_DIR, 'synthetic.py'), '--rows', str(rows), option, path],
+                   check=True)
+
+
+def dataset(work_dir, rows, fmt):
+    path = os.path.join(work_dir, 'data', f"dataset_{rows}.{fmt}")
+    if not os.path.exists(path):
+        _generate(rows, '--output', path)
+    return path
+
+
+def per_repo_dir(work_dir, rows):
+    path = os.path.join(work_dir, 'data', f"per_repo_{rows}")
+    if not os.path.isdir(path):
+        _generate(rows, '--per-repo', path)
+    return path
+
+
+# --- CENÁRIOS ---
+
+def run_collect(args, run_dir):
+    stub = subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, 'stub_server.py'), '--port', '0',
+                             '--repos', str(args.repos), '--latency', str(args.latency),
+                             '--error-rate', str(args.error_rate), '--secondary-rate', str(args.secondary_rate),
+                             '--rate-limit', str(args.rate_limit)],
+                            stdout=subprocess.PIPE, text=True)
+    try:
+        url = stub.stdout.readline().split()[-1]
+        env = {'GITHUB_API_URL': url, 'TOKENS': ' '.join(f"bench{i}" for i in range(args.tokens)),
+               'HTTP_CACHE': 'off'}
+        command = [sys.executable, os.path.join(CODE_DIR, 'main.py'), '--repos', str(args.repos), '--min-prs', '0',
+                   '--engine', args.engine, '--metrics', 'metrics.jsonl']
+        seconds, rss, code = measure(command, run_dir, env)
+    finally:
+        stub.terminate()
+        stub.wait()
+    output = os.path.join(run_dir, 'dataset_completo.csv')
+    return seconds, rss, code, count_rows(output) if os.path.exists(output) else 0
+
+
+def run_combine(args, run_dir):
+    source = per_repo_dir(args.work_dir, args.combine_rows)
+    code = ("import sys; sys.path.insert(0, sys.argv[1]); from main import combine_csvs; "
+            "combine_csvs(input_dir=sys.argv[2], output_file='dataset_completo.csv')")
+    seconds, rss, status = measure([sys.executable, '-c', code, CODE_DIR, source], run_dir, {'TOKENS': 'bench'})
+    return seconds, rss, status, args.combine_rows
+
+
+def run_analysis(script):
+    def run(args, run_dir):
+        path = dataset(args.work_dir, args.rows, args.format)
+        env = {'DATASET_PATH': path, 'MPLBACKEND': 'Agg', 'ANALYSIS_CACHE': '1' if args.warm_cache else '0',
+               'ANALYSIS_CACHE_DIR': os.path.join(args.work_dir, 'analysis_cache'), 'ANALYSIS_BACKEND': args.backend}
+        seconds, rss, code = measure([sys.executable, script], run_dir, env)
+        return seconds, rss, code, args.rows
+    return run
+
+
+RUNNERS = {'collect': run_collect, 'combine': run_combine, 'table': run_analysis(os.path.join(CODE_DIR, 'table.py'))}
+RUNNERS.update({name: run_analysis(os.path.join(PLOTS_DIR, f"{name}.py")) for name in PLOT_SCRIPTS})
+
+
+# --- BASELINE ---
+
+def compare(results, baseline, tolerance):
+    """Lista de (cenário, métrica, baseline, atual) que pioraram mais que `tolerance`."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get('scenarios', {}).get(name)
+        if not reference or reference.get('rows') != result['rows'] or result['exit_code']:
+            continue
+        for metric in COMPARED:
+            if reference.get(metric) and result[metric] > reference[metric] * (1 + tolerance):
+                regressions.append((name, metric, reference[metric], result[metric]))
+    return regressions
+
+
+def print_results(results, baseline):
+    print(f"\n{'cenário':<12} {'s':>9} {'linhas/s':>12} {'RSS (MiB)':>10} {'Δ tempo':>8}  status")
+    for name, r in results.items():
+        reference = baseline.get('scenarios', {}).get(name) or {}
+        delta = f"{r['seconds'] / reference['seconds'] - 1:+.0%}" if reference.get('seconds') and reference.get('rows') == r['rows'] else '-'
+        status = 'ok' if r['exit_code'] == 0 else f"erro {r['exit_code']}"
+        print(f"{name:<12} {r['seconds']:>9.2f} {r['throughput']:>12,.0f} {r['max_rss_mb']:>10.0f} {delta:>8}  {status}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks da coleta e da análise com dados sintéticos.")
+    parser.add_argument('--only', default=None, help=f"Cenários separados por vírgulas entre: {', '.join(SCENARIOS)}.")
+    parser.add_argument('--rows', type=float, default=1e5, help="Linhas do dataset sintético da análise (1e5 a 1e8).")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help="Formato do dataset da análise.")
+    parser.add_argument('--combine-rows', type=float, default=1e5, help="Linhas dos CSVs por repositório do combine_csvs.")
+    parser.add_argument('--backend', choices=['auto', 'duckdb', 'pandas'], default='auto',
+                        help="Motor da análise (ANALYSIS_BACKEND).")
+    parser.add_argument('--warm-cache', action='store_true', help="Mantém o cache em disco da análise entre execuções.")
+    collect = parser.add_argument_group('coleta (stub local)')
+    collect.add_argument('--repos', type=int, default=20)
+    collect.add_argument('--tokens', type=int, default=1)
+    collect.add_argument('--engine', choices=['async', 'pool'], default='async')
+    collect.add_argument('--latency', type=float, default=50, help="Latência do stub (ms).")
+    collect.add_argument('--error-rate', type=float, default=0.0)
+    collect.add_argument('--secondary-rate', type=float, default=0.0)
+    collect.add_argument('--rate-limit', type=int, default=5000)
+    parser.add_argument('--work-dir', default=DEFAULT_WORK_DIR, help="Dados sintéticos e saídas dos cenários.")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="Grava os resultados como novo baseline.")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Piora aceita antes de acusar regressão.")
+    args = parser.parse_args(argv)
+    args.rows, args.combine_rows = int(args.rows), int(args.combine_rows)
+
+    names = args.only.split(',') if args.only else SCENARIOS
+    unknown = [n for n in names if n not in RUNNERS]
+    if unknown:
+        parser.error(f"Cenários desconhecidos: {', '.join(unknown)}")
+    try:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = {}
+
+    results = {}
+    for name in names:
+        run_dir = os.path.join(args.work_dir, 'runs', name)
+        shutil.rmtree(run_dir, ignore_errors=True)
+        print(f"Executando '{name}'...")
+        seconds, rss, code, rows = RUNNERS[name](args, run_dir)
+        results[name] = {'seconds': seconds, 'rows': rows, 'throughput': rows / seconds if seconds else 0,
+                         'max_rss_mb': rss, 'exit_code': code}
+        if code:
+            print(f"  '{name}' terminou com código {code}; saída em {os.path.join(run_dir, 'log.txt')}")
+
+    print_results(results, baseline)
+    regressions = compare(results, baseline, args.tolerance)
+    for name, metric, reference, current in regressions:
+        print(f"REGRESSÃO: {name} {metric} {reference:.2f} -> {current:.2f} (+{current / reference - 1:.0%})")
+
+    if args.save_baseline:
+        scenarios = {**baseline.get('scenarios', {}), **{n: r for n, r in results.items() if not r['exit_code']}}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'saved_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                       'machine': f"{platform.node()} {platform.machine()} {os.cpu_count()} CPUs",
+                       'scenarios': scenarios}, f, indent=2)
+        print(f"Baseline gravado em '{args.baseline}'.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""Servidor local que imita a API GraphQL do GitHub para medir a coleta sem token e sem rede.
+
+Responde às queries de códigos/ (busca de repositórios por faixa de estrelas, páginas de
+`pullRequests`, queries em lote com aliases r0, r1, ... e busca de PRs `type: ISSUE`) com
+PRs gerados a partir das distribuições de resultados_csv/ (ver synthetic.py), incluindo
+PRs sem revisão que a coleta descarta. Latência, erros 5xx e limites de taxa (primário
+com X-RateLimit-*, secundário com Retry-After) são configuráveis.
+
+Uso:
+    python benchmarks/stub_server.py --port 8765 --repos 50 --latency 80 --error-rate 0.02
+    GITHUB_API_URL=http://127.0.0.1:8765/ TOKENS=bench python códigos/main.py
+"""
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from synthetic import SOURCE_DIR, ValueModel
+
+# --- CONFIGURAÇÕES ---
+SEARCH_RESULT_CAP = 1000
+REPO_PAGE_SIZE = 100
+_ORIGIN = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def _iso(moment):
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class FakeGitHub:
+    """Repositórios e PRs sintéticos, determinísticos para uma mesma semente."""
+
+    def __init__(self, repos, source=SOURCE_DIR, unreviewed=0.3, seed=42):
+        self.model = ValueModel.from_dir(source)
+        self.unreviewed = unreviewed
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        # Totais de PRs fechados log-uniformes entre 50 e 20000; estrelas decrescentes
+        totals = np.exp(rng.uniform(np.log(50), np.log(20000), size=repos)).astype(int)
+        self.repos = [{'owner': {'login': f"bench{i % 7}"}, 'name': f"repo{i}", 'stargazerCount': 500_000 // (i + 1),
+                       'pullRequests': {'totalCount': int(totals[i])}} for i in range(repos)]
+        self._by_name = {(r['owner']['login'], r['name']): i for i, r in enumerate(self.repos)}
+        self._nodes = {}
+        self._lock = threading.Lock()
+
+    def search_repos(self, query, after):
+        match = re.search(r'stars:(<=|<)?(\d+)', query)
+        compare = {'<=': int.__le__, '<': int.__lt__, None: int.__eq__}[match.group(1)] if match else None
+        matching = [r for r in self.repos if match is None or compare(r['stargazerCount'], int(match.group(2)))]
+        start = int(after or 0)
+        end = min(start + REPO_PAGE_SIZE, len(matching), SEARCH_RESULT_CAP)
+        return {'repositoryCount': len(matching), 'nodes': matching[start:end],
+                'pageInfo': {'endCursor': str(end), 'hasNextPage': end < min(len(matching), SEARCH_RESULT_CAP)}}
+
+    def nodes(self, owner, name):
+        """PRs do repositório, do mais recente para o mais antigo (gerados no primeiro uso)."""
+        index = self._by_name.get((owner, name))
+        if index is None:
+            return None
+        with self._lock:
+            if index not in self._nodes:
+                self._nodes[index] = self._generate(index)
+            return self._nodes[index]
+
+    def _generate(self, index):
+        total = self.repos[index]['pullRequests']['totalCount']
+        rng = np.random.default_rng((self.seed, index))
+        model = self.model
+        source = rng.integers(len(model.sizes))
+        rows = model.offsets[source] + rng.integers(model.sizes[source], size=total)
+        values = model.values.iloc[rows].reset_index(drop=True)
+        created = [_ORIGIN + timedelta(hours=float(h)) for h in np.sort(rng.uniform(0, 4 * 365 * 24, size=total))[::-1]]
+        unreviewed = rng.random(total) < self.unreviewed
+        nodes = []
+        for i, row in enumerate(values.itertuples(index=False)):
+            closed = created[i] + timedelta(hours=float(row.analysis_time_hours))
+            nodes.append({
+                'number': total - i, 'state': row.status, 'createdAt': _iso(created[i]), 'closedAt': _iso(closed),
+                'updatedAt': _iso(closed), 'additions': int(row.size_additions), 'deletions': int(row.size_deletions),
+                'changedFiles': int(row.size_files), 'bodyText': 'x' * int(row.description_chars),
+                'participants': {'totalCount': int(row.interaction_participants)},
+                'comments': {'totalCount': int(row.interaction_comments)},
+                'reviews': {'totalCount': 0 if unreviewed[i] else int(row.reviews_count)},
+            })
+        return nodes
+
+    def pr_page(self, owner, name, after, size, reviewed_only=False):
+        nodes = self.nodes(owner, name)
+        if nodes is None:
+            return None
+        if reviewed_only:
+            nodes = [n for n in nodes if n['reviews']['totalCount'] > 0]
+        start = int(after or 0)
+        end = min(start + size, len(nodes))
+        return {'nodes': nodes[start:end], 'pageInfo': {'endCursor': str(end), 'hasNextPage': end < len(nodes)}}
+
+
+class RateLimiter:
+    """Orçamento de pontos por token, renovado a cada `window` segundos."""
+
+    def __init__(self, points, window):
+        self.points = points
+        self.window = window
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def spend(self, token, cost):
+        """Retorna (restante, reset em epoch) ou None se o orçamento do token acabou."""
+        now = time.time()
+        with self._lock:
+            remaining, reset_at = self._tokens.get(token, (self.points, now + self.window))
+            if now >= reset_at:
+                remaining, reset_at = self.points, now + self.window
+            if remaining < cost:
+                self._tokens[token] = (remaining, reset_at)
+                return None, reset_at
+            self._tokens[token] = (remaining - cost, reset_at)
+            return remaining - cost, reset_at
+
+
+def _page_size(query, variables):
+    if variables.get('pageSize'):
+        return int(variables['pageSize'])
+    match = re.search(r'pullRequests\(first: (\d+)|search\(query: \$searchQuery, type: ISSUE, first: (\d+)', query)
+    return int(match.group(1) or match.group(2)) if match else 40
+
+
+def make_handler(github, limiter, options):
+    rng = np.random.default_rng(options.seed)
+    rng_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, payload=None, headers=()):
+            body = json.dumps(payload if payload is not None else {}).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in headers:
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            query, variables = body['query'], body.get('variables') or {}
+            with rng_lock:
+                jitter = rng.exponential(options.jitter / 1000) if options.jitter else 0.0
+                roll = rng.random()
+            time.sleep(options.latency / 1000 + jitter)
+
+            if roll < options.error_rate:
+                return self._send(502, {'message': 'Server Error'})
+            if roll < options.error_rate + options.secondary_rate:
+                return self._send(403, {'message': 'You have exceeded a secondary rate limit.'},
+                                  [('Retry-After', '1')])
+            token = self.headers.get('Authorization', '')
+            aliases = re.findall(r'(r\d+): repository', query)
+            cost = max(1, len(aliases))
+            remaining, reset_at = limiter.spend(token, cost)
+            rate_headers = [('X-RateLimit-Limit', str(limiter.points)),
+                            ('X-RateLimit-Remaining', str(remaining or 0)),
+                            ('X-RateLimit-Reset', str(int(reset_at)))]
+            if remaining is None:
+                return self._send(403, {'message': 'API rate limit exceeded'}, rate_headers)
+
+            size = _page_size(query, variables)
+            if 'type: REPOSITORY' in query:
+                data = {'search': github.search_repos(variables.get('searchQuery', ''), variables.get('afterCursor'))}
+            elif 'type: ISSUE' in query:
+                repo = re.search(r'repo:([^/\s]+)/(\S+)', variables['searchQuery'])
+                page = github.pr_page(repo.group(1), repo.group(2), variables.get('afterCursor'), size, reviewed_only=True)
+                data = {'search': page or {'nodes': [], 'pageInfo': {'endCursor': None, 'hasNextPage': False}}}
+            elif aliases:
+                data = {}
+                for alias in aliases:
+                    i = alias[1:]
+                    page = github.pr_page(variables[f"o{i}"], variables[f"n{i}"], variables.get(f"c{i}"), size)
+                    data[alias] = {'pullRequests': page} if page else None
+            else:
+                page = github.pr_page(variables['owner'], variables['name'], variables.get('afterCursor'), size)
+                if page is None:
+                    return self._send(200, {'data': {'repository': None}, 'errors': [
+                        {'type': 'NOT_FOUND', 'path': ['repository'], 'message': 'Could not resolve to a Repository'}]})
+                data = {'repository': {'pullRequests': page}}
+            data['rateLimit'] = {'cost': cost, 'remaining': remaining, 'limit': limiter.points,
+                                 'resetAt': _iso(datetime.fromtimestamp(reset_at, timezone.utc))}
+            self._send(200, {'data': data}, rate_headers)
+
+    return Handler
+
+
+def serve(options):
+    github = FakeGitHub(options.repos, source=options.source, unreviewed=options.unreviewed, seed=options.seed)
+    limiter = RateLimiter(options.rate_limit, options.rate_window)
+    server = ThreadingHTTPServer(('127.0.0.1', options.port), make_handler(github, limiter, options))
+    server.daemon_threads = True
+    print(f"Servindo em http://127.0.0.1:{server.server_address[1]}/", flush=True)
+    server.serve_forever()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stub local da API GraphQL do GitHub para benchmarks.")
+    parser.add_argument('--port', type=int, default=8765, help="Porta (0 = escolhe uma livre e imprime).")
+    parser.add_argument('--repos', type=int, default=50, help="Repositórios na busca.")
+    parser.add_argument('--unreviewed', type=float, default=0.3, help="Fração de PRs sem revisão.")
+    parser.add_argument('--latency', type=float, default=50, help="Latência base por resposta (ms).")
+    parser.add_argument('--jitter', type=float, default=20, help="Média da parte exponencial da latência (ms).")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fração de respostas 502.")
+    parser.add_argument('--secondary-rate', type=float, default=0.0,
+                        help="Fração de respostas 403 de limite secundário (Retry-After: 1).")
+    parser.add_argument('--rate-limit', type=int, default=5000, help="Pontos por token a cada --rate-window.")
+    parser.add_argument('--rate-window', type=float, default=3600, help="Janela do limite primário (s).")
+    parser.add_argument('--source', default=SOURCE_DIR, help="CSVs reais usados como modelo dos PRs.")
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    serve(parse_args(sys.argv[1:]))
@@ -0,0 +1,121 @@
+"""Gerador de datasets sintéticos no formato de dataset_completo.csv, para medir a análise
+com 10^5 a 10^8 linhas sem depender da API.
+
+Os valores vêm dos CSVs reais de resultados_csv/: cada repositório sintético copia o
+tamanho de um repositório real sorteado e suas linhas são reamostradas (com reposição)
+das linhas desse repositório, então as distribuições por coluna, as correlações entre
+colunas e a proporção MERGED/CLOSED de cada repositório são preservadas.
+
+Uso:
+    python benchmarks/synthetic.py --rows 1e6 --output bench/dataset_1e6.csv
+    python benchmarks/synthetic.py --rows 1e7 --output bench/dataset_1e7.parquet
+    python benchmarks/synthetic.py --rows 1e5 --per-repo bench/resultados_csv
+"""
+import argparse
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'códigos'))
+from storage import _arrow_schema, get_storage, to_typed_frame  # noqa: E402
+
+# --- CONFIGURAÇÕES ---
+SOURCE_DIR = os.path.join(ROOT, 'resultados_csv')
+CHUNK_ROWS = 1_000_000
+SEED = 42
+
+
+class ValueModel:
+    """Linhas reais agrupadas por repositório, de onde os repositórios sintéticos são reamostrados."""
+
+    def __init__(self, frame):
+        frame = frame.sort_values('repository', kind='stable').reset_index(drop=True)
+        repository = frame['repository'].astype(str)
+        self.names, starts, self.sizes = np.unique(repository.to_numpy(), return_index=True, return_counts=True)
+        self.offsets = starts
+        self.values = frame.drop(columns='repository')
+
+    @classmethod
+    def from_dir(cls, source=SOURCE_DIR):
+        frames = [get_storage('csv').read_repo(f) for f in sorted(glob.glob(os.path.join(source, '*.csv')))]
+        frames = [f for f in frames if len(f)]
+        if not frames:
+            raise FileNotFoundError(f"Nenhum CSV com dados em '{source}'")
+        return cls(pd.concat(frames, ignore_index=True))
+
+    def sample(self, rows, rng, first_repo=0):
+        """DataFrame com cerca de `rows` linhas (repositórios inteiros) e o número de
+        repositórios sintéticos usados; os nomes continuam a numeração de `first_repo`."""
+        picks = []
+        total = 0
+        while total < rows:
+            batch = rng.integers(len(self.sizes), size=max(1, (rows - total) // int(self.sizes.mean()) + 1))
+            picks.append(batch)
+            total += int(self.sizes[batch].sum())
+        picks = np.concatenate(picks)
+        # Só os repositórios necessários para chegar a `rows` (o último pode sobrar em parte)
+        picks = picks[:np.searchsorted(np.cumsum(self.sizes[picks]), rows) + 1]
+        sizes = self.sizes[picks]
+
+        owner = np.repeat(picks, sizes)
+        index = self.offsets[owner] + (rng.random(len(owner)) * self.sizes[owner]).astype(np.int64)
+        frame = self.values.iloc[index].reset_index(drop=True)
+        names = [f"{self.names[p]}~{first_repo + i}" for i, p in enumerate(picks)]
+        repository = pd.Categorical.from_codes(np.repeat(np.arange(len(picks)), sizes), names)
+        frame.insert(0, 'repository', repository)
+        return to_typed_frame(frame), len(picks)
+
+
+def generate(rows, output=None, per_repo=None, source=SOURCE_DIR, seed=SEED, chunk_rows=CHUNK_ROWS):
+    """Gera `rows` linhas sintéticas num CSV/Parquet combinado (`output`) ou num diretório
+    com um CSV por repositório (`per_repo`), em blocos de `chunk_rows` linhas."""
+    model = ValueModel.from_dir(source)
+    rng = np.random.default_rng(seed)
+    target = output or per_repo
+    os.makedirs(per_repo or os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    writer = None
+    written = repos = 0
+    try:
+        while written < rows:
+            chunk, used = model.sample(min(chunk_rows, rows - written), rng, first_repo=repos)
+            chunk = chunk.iloc[:rows - written]
+            repos += used
+            if per_repo:
+                storage = get_storage('csv')
+                for name, group in chunk.groupby('repository', observed=True):
+                    storage.write_repo(group, os.path.join(per_repo, name.replace('/', '-') + storage.extension))
+            elif output.endswith('.parquet'):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                if writer is None:
+                    writer = pq.ParquetWriter(output, _arrow_schema())
+                writer.write_table(pa.Table.from_pandas(chunk, schema=_arrow_schema(), preserve_index=False))
+            else:
+                chunk.to_csv(output, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+            written += len(chunk)
+            print(f"  {written:,}/{rows:,} linhas geradas em '{target}'", end='\r')
+    finally:
+        if writer is not None:
+            writer.close()
+    print(f"\n{written:,} linhas de {repos:,} repositórios sintéticos salvas em '{target}'.")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera um dataset sintético a partir das distribuições de resultados_csv/.")
+    parser.add_argument('--rows', type=float, required=True, help="Número de linhas (ex.: 1e5, 1e8).")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--output', help="Arquivo combinado (.csv ou .parquet).")
+    target.add_argument('--per-repo', help="Diretório com um CSV por repositório (entrada do combine_csvs).")
+    parser.add_argument('--source', default=SOURCE_DIR, help="Diretório com os CSVs reais usados como modelo.")
+    parser.add_argument('--seed', type=int, default=SEED)
+    args = parser.parse_args(argv)
+    generate(int(args.rows), output=args.output, per_repo=args.per_repo, source=args.source, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
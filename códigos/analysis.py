@@ -0,0 +1,125 @@
+import os
+
+import numpy as np
+
+from compute_cache import ComputeCache, dataset_fingerprint
+from storage import COLUMNS, load_dataset
+
+# --- CONFIGURAÇÕES ---
+DATASET_PATH = os.getenv('DATASET_PATH', './dataset_completo.csv')
+USE_CACHE = os.getenv('ANALYSIS_CACHE', '1') != '0'
+# 'duckdb' (consultas fora da memória, ver lazy_analysis) ou 'pandas' (dataset em memória);
+# 'auto' usa o DuckDB quando ele está instalado
+BACKENDS = ('auto', 'duckdb', 'pandas')
+BACKEND = os.getenv('ANALYSIS_BACKEND', 'auto')
+# Colunas numéricas originais do dataset (sem as derivadas), usadas no heatmap
+NUMERIC_COLUMNS = [c for c in COLUMNS if c not in ('repository', 'status')]
+
+# Métricas da tabela de medianas e seus nomes na tabela final
+TABLE_METRICS = {
+    'size_files': 'Tamanho (Arquivos)',
+    'size_total_lines': 'Tamanho (Linhas Add+Del)',
+    'analysis_time_hours': 'Tempo de Análise (Horas)',
+    'description_chars': 'Descrição (Caracteres)',
+    'interaction_participants': 'Interações (Participantes)',
+    'interaction_comments': 'Interações (Comentários)'
+}
+# Ordem dos status nas tabelas publicadas: a da coluna de texto original (alfabética),
+# não a da categoria do esquema, que segue as paletas dos gráficos
+TABLE_STATUSES = ['CLOSED', 'MERGED']
+
+_OPERATORS = {
+    '<': lambda series, limit: series < limit,
+    '<=': lambda series, limit: series <= limit,
+}
+
+
+class AnalysisData:
+    """Dataset carregado uma única vez, com as colunas derivadas e um cache dos cortes
+    por quantil e das visões filtradas usados pelas RQs e pela tabela de medianas.
+
+    Os filtros são descritos por condições (coluna, operador, quantil), por exemplo
+    ('reviews_count', '<=', 0.9) mantém as linhas até o 90º percentil de revisões.
+
+    Com `use_cache`, quantis, índices das linhas filtradas e a tabela de medianas também
+    ficam num cache em disco (compute_cache) ligado ao conteúdo do dataset, e execuções
+    seguintes sobre o mesmo arquivo não recalculam nada.
+    """
+
+    def __init__(self, path=DATASET_PATH, use_cache=USE_CACHE):
+        self.path = path
+        self.cache = ComputeCache(dataset_fingerprint(path)) if use_cache else None
+        self.df = load_dataset(path, columns=['status'] + NUMERIC_COLUMNS)
+        # Métrica consolidada para o tamanho total das linhas
+        self.df['size_total_lines'] = self.df['size_additions'] + self.df['size_deletions']
+        self._quantiles = {}
+        self._masks = {}
+        self._views = {}
+        self._medians = None
+
+    def _memoize(self, kind, params, compute):
+        if self.cache is None:
+            return compute()
+        return self.cache.memoize(kind, params, compute)
+
+    def quantile(self, column, q):
+        key = (column, q)
+        if key not in self._quantiles:
+            self._quantiles[key] = self._memoize('quantile', key, lambda: float(self.df[column].quantile(q)))
+        return self._quantiles[key]
+
+    def _mask(self, condition):
+        if condition not in self._masks:
+            column, op, q = condition
+            self._masks[condition] = _OPERATORS[op](self.df[column], self.quantile(column, q))
+        return self._masks[condition]
+
+    def filtered(self, *conditions, columns=None):
+        """Linhas que atendem a todas as condições, só com `columns` se informadas (a visão
+        fica em cache; não altere)."""
+        if columns is not None:
+            return self.filtered(*conditions)[list(columns)]
+        key = tuple(sorted(conditions))
+        if key not in self._views:
+            def rows():
+                mask = self._mask(key[0])
+                for condition in key[1:]:
+                    mask = mask & self._mask(condition)
+                return np.flatnonzero(mask.to_numpy())
+            self._views[key] = self.df.iloc[self._memoize('filter', key, rows)]
+        return self._views[key]
+
+    def median_table(self):
+        """Mediana de cada métrica por status, com os nomes da tabela final."""
+        if self._medians is None:
+            def medians():
+                table = self.df.groupby('status', observed=True)[list(TABLE_METRICS)].median()
+                return table.rename(columns=TABLE_METRICS)
+            self._medians = self._memoize('median_table', tuple(TABLE_METRICS), medians)
+        return self._medians
+
+    def spearman(self, columns=NUMERIC_COLUMNS):
+        """Matriz de correlação de Spearman das colunas (padrão: as numéricas originais)."""
+        return self._memoize('spearman', tuple(columns), lambda: self.df[list(columns)].corr(method='spearman'))
+
+
+def in_table_order(table):
+    """Tabela por status (uma linha por status) na ordem de TABLE_STATUSES."""
+    return table.reindex([s for s in TABLE_STATUSES if s in table.index])
+
+
+def open_analysis(path=DATASET_PATH, use_cache=USE_CACHE, backend=None):
+    """AnalysisData do backend configurado (ANALYSIS_BACKEND ou `backend`). Sem o pacote
+    duckdb, o modo 'auto' volta para o pandas."""
+    backend = backend or BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de análise desconhecido: {backend}")
+    if backend != 'pandas':
+        try:
+            from lazy_analysis import DuckDBAnalysisData
+        except ImportError:
+            if backend == 'duckdb':
+                raise ImportError("O backend 'duckdb' precisa do pacote 'duckdb' (pip install duckdb).")
+        else:
+            return DuckDBAnalysisData(path, use_cache=use_cache)
+    return AnalysisData(path, use_cache=use_cache)
@@ -0,0 +1,356 @@
+import asyncio
+import json
+import random
+import time
+from collections import deque
+
+import aiohttp
+
+from main import (GITHUB_API_URL, INCREMENTAL_MAX_PRS, MAX_RATE_LIMIT_WAITS, finish_repo,
+                  make_checkpoint, newer_nodes, page_sizer, repo_failed, repo_full_name, repo_output_path,
+                  report_progress, start_repo)
+from batch_queries import AdaptiveBatchSize, build_batch_query, demultiplex, query_cost
+from crawl_state import get_crawl_state
+from http_cache import get_http_cache
+from metrics import METRICS
+from query_planner import (PAGE_MAX_ATTEMPTS, AdaptivePageSize, PageTimeoutError, extract_pr_page, get_source,
+                           max_raw_prs, plan_pr_page)
+from rate_limit import RateLimitError, check_rate_limit
+from scheduler import as_completed_by_cost, by_cost
+from token_pool import TOKEN_POOL
+
+# --- CONFIGURAÇÕES ---
+MAX_ATTEMPTS = 7
+# No modo em lote uma falha reduz o lote em vez de insistir no mesmo documento
+BATCH_MAX_ATTEMPTS = 2
+MAX_REPO_FAILURES = 3
+REQUEST_TIMEOUT = 90
+RETRY_STATUS = {502, 503, 504}
+
+# --- FUNÇÃO DE API ASSÍNCRONA ---
+def _error_cause(error):
+    """Causa de uma nova tentativa após erro de rede/HTTP, para as métricas."""
+    if isinstance(error, asyncio.TimeoutError):
+        return 'timeout'
+    if isinstance(error, aiohttp.ClientResponseError):
+        return f"http_{error.status}"
+    if isinstance(error, aiohttp.ClientPayloadError):
+        return 'invalid_response'
+    return 'connection'
+
+async def run_graphql_query_async(session, semaphore, query, variables=None, max_attempts=MAX_ATTEMPTS,
+                                  timing=None):
+    """Versão assíncrona de run_graphql_query: reaproveita as conexões da sessão,
+    limita o número de queries em andamento pelo semáforo e usa o mesmo pool de
+    tokens (cada um com seu agendador de limite de taxa) do motor síncrono."""
+    cache = get_http_cache()
+    cached = cache.get(query, variables)
+    if cached is not None:
+        METRICS.inc('graphql_cache_hits_total')
+        return cached
+    request_body = {'query': query, 'variables': variables or {}}
+
+    attempt = 0
+    rate_limit_waits = 0
+    while True:
+        token = TOKEN_POOL.acquire()
+        await token.scheduler.wait_async(cost_key=query)
+        try:
+            async with semaphore:
+                started = time.perf_counter()
+                async with session.post(GITHUB_API_URL, headers=token.headers, json=request_body) as response:
+                    body = await response.read()
+                    elapsed = time.perf_counter() - started
+                    if timing is not None:
+                        timing['seconds'] = elapsed
+                    METRICS.observe('graphql_request_seconds', elapsed, engine='async', status=response.status)
+                    METRICS.inc('graphql_response_bytes_total', len(body))
+                    try:
+                        json_response = json.loads(body)
+                    except ValueError:
+                        json_response = None
+                    METRICS.inc('graphql_cost_points_total', query_cost(json_response) or 0)
+                    token.scheduler.update(response.headers, json_response, cost_key=query)
+                    check_rate_limit(response.status, response.headers, json_response)
+                    if response.status == 401:
+                        TOKEN_POOL.revoke(token, f"HTTP {response.status}")
+                        METRICS.inc('retries_total', cause='unauthorized')
+                        continue
+                    if response.status in RETRY_STATUS:
+                        print(f"\nServidor retornou {response.status}. Nova tentativa em andamento...")
+                    response.raise_for_status()
+            if json_response is None:
+                raise aiohttp.ClientPayloadError("Resposta sem JSON válido.")
+            if 'errors' in json_response:
+                print(f"\nErro na query GraphQL: {json_response['errors']}")
+            cache.put(query, variables, json_response)
+            return json_response
+
+        except RateLimitError as e:
+            token.rate_limited += 1
+            rate_limit_waits += 1
+            METRICS.inc('retries_total', cause='rate_limit')
+            if rate_limit_waits > MAX_RATE_LIMIT_WAITS * len(TOKEN_POOL):
+                print(f"\nLimite de taxa persistente após {rate_limit_waits - 1} esperas.")
+                raise
+            wait_time = token.scheduler.pause(e)
+            print(f"\nLimite de taxa atingido em {token.label} ({e}). Token pausado por {wait_time:.0f} segundos...")
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            token.errors += 1
+            attempt += 1
+            METRICS.inc('retries_total', cause=_error_cause(e))
+            if attempt < max_attempts:
+                wait_time = (2 ** (attempt - 1)) + random.random()
+                print(f"\nErro de rede ({e!r}). Tentando novamente em {wait_time:.2f} segundos...")
+                await asyncio.sleep(wait_time)
+            else:
+                print(f"\nFalha na query após {max_attempts} tentativas.")
+                raise
+
+# --- FUNÇÕES DE COLETA DE DADOS ---
+async def get_prs_for_repo_async(session, semaphore, owner, name, max_prs=200,
+                                 after_cursor=None, fetched=0, on_page=None, updated_after=None, valid=0,
+                                 pager=None):
+    """Busca os pull requests de um repositório até juntar max_prs PRs válidos
+    (mesmos parâmetros de retomada, do modo incremental e do tamanho adaptativo de
+    página de get_prs_for_repo)."""
+    new_prs = 0
+    max_fetched = max_raw_prs(max_prs)
+    pager = pager or AdaptivePageSize()
+
+    while valid < max_prs and fetched < max_fetched:
+        size = pager.size
+        query, variables = plan_pr_page(owner, name, after_cursor, updated_after, page_size=size)
+        timing = {}
+        try:
+            with METRICS.timer('repo_phase_seconds_total', repo=f"{owner}/{name}", phase='fetch'):
+                result = await run_graphql_query_async(session, semaphore, query, variables,
+                                                       max_attempts=PAGE_MAX_ATTEMPTS, timing=timing)
+            pr_data = extract_pr_page(result)
+        except (aiohttp.ClientError, asyncio.TimeoutError, PageTimeoutError) as e:
+            if not pager.failure(size):
+                raise
+            METRICS.inc('pr_page_failures_total')
+            reason = e if isinstance(e, PageTimeoutError) else _error_cause(e)
+            print(f"  -> {owner}/{name}: página de {size} PRs falhou ({reason}); nova tentativa com {pager.size}.")
+            continue
+        pager.success(size, timing.get('seconds', 0))
+        METRICS.observe('pr_page_size', size)
+
+        nodes, reached_known = newer_nodes(pr_data['nodes'], updated_after)
+        fetched += len(nodes)
+        new_prs += len(nodes)
+        if on_page:
+            with METRICS.timer('repo_phase_seconds_total', repo=f"{owner}/{name}", phase='parse'):
+                valid += on_page(nodes, pr_data['pageInfo']['endCursor'], max_prs - valid)
+        else:
+            valid += len(nodes)
+
+        if reached_known:
+            print(f"  -> {owner}/{name}: alcançou PRs já coletados, {new_prs} novos.")
+            break
+
+        if valid >= max_prs:
+            print(f"  -> Limite de {max_prs} PRs válidos atingido para {owner}/{name}.")
+            break
+
+        if not pr_data['pageInfo']['hasNextPage']:
+            break
+        if fetched >= max_fetched:
+            print(f"  -> {owner}/{name}: {fetched} PRs lidos, {valid} válidos; parando a paginação.")
+            break
+        after_cursor = pr_data['pageInfo']['endCursor']
+
+    return new_prs
+
+async def process_and_save_repo_async(session, semaphore, repo, output_dir, incremental=False):
+    """Equivalente assíncrono de process_and_save_repo (mesmo CSV e mesmo estado de coleta)."""
+    state = get_crawl_state()
+    repo_name_full = None
+    try:
+        owner = repo['owner']['login']
+        name = repo['name']
+        repo_name_full = f"{owner}/{name}"
+
+        filepath = repo_output_path(output_dir, owner, name)
+
+        resume = start_repo(state, repo_name_full, filepath, incremental)
+        if resume is None:
+            return 0
+        after_cursor, fetched, updated_after, valid = resume
+
+        pager = page_sizer(state, repo_name_full)
+        try:
+            await get_prs_for_repo_async(session, semaphore, owner, name,
+                                         max_prs=INCREMENTAL_MAX_PRS if updated_after else 200,
+                                         after_cursor=after_cursor, fetched=fetched, valid=valid,
+                                         on_page=make_checkpoint(state, repo_name_full),
+                                         updated_after=updated_after, pager=pager)
+        finally:
+            state.set_page_size(repo_name_full, pager.size)
+        return finish_repo(state, repo_name_full, filepath, merge=bool(updated_after))
+
+    except Exception as e:
+        print(f"ERRO ao processar {repo.get('name')}: {e!r}")
+        if repo_name_full:
+            state.fail(repo_name_full, repr(e))
+        return 0
+
+class RepoCrawl:
+    """Estado da paginação de um repositório no modo em lote."""
+
+    def __init__(self, repo, output_dir, state, max_prs=200):
+        self.owner = repo['owner']['login']
+        self.name = repo['name']
+        self.repo_name_full = f"{self.owner}/{self.name}"
+        self.filepath = repo_output_path(output_dir, self.owner, self.name)
+        self.state = state
+        self.checkpoint = make_checkpoint(state, self.repo_name_full)
+        self.max_prs = max_prs
+        self.after_cursor = None
+        self.fetched = 0
+        self.valid = 0
+        self.failures = 0
+        self.done = False
+
+    def start(self):
+        """Consulta o estado; retorna False se o repositório deve ser pulado."""
+        resume = start_repo(self.state, self.repo_name_full, self.filepath)
+        if resume is None:
+            return False
+        # O modo em lote só faz coletas completas (o incremental usa o caminho por repositório)
+        self.after_cursor, self.fetched, _, self.valid = resume
+        self.done = self.valid >= self.max_prs or self.fetched >= max_raw_prs(self.max_prs)
+        return True
+
+    def add_page(self, pr_data):
+        with METRICS.timer('repo_phase_seconds_total', repo=self.repo_name_full, phase='parse'):
+            self._add_page(pr_data)
+
+    def _add_page(self, pr_data):
+        nodes = pr_data['nodes']
+        self.fetched += len(nodes)
+        self.valid += self.checkpoint(nodes, pr_data['pageInfo']['endCursor'], self.max_prs - self.valid)
+        if self.valid >= self.max_prs:
+            print(f"  -> Limite de {self.max_prs} PRs válidos atingido para {self.repo_name_full}.")
+            self.done = True
+        elif not pr_data['pageInfo']['hasNextPage'] or self.fetched >= max_raw_prs(self.max_prs):
+            self.done = True
+        else:
+            self.after_cursor = pr_data['pageInfo']['endCursor']
+
+    def save(self):
+        try:
+            return finish_repo(self.state, self.repo_name_full, self.filepath)
+        except Exception as e:
+            self.fail(e)
+            return 0
+
+    def fail(self, error):
+        print(f"ERRO ao processar {self.name}: {error!r}")
+        self.state.fail(self.repo_name_full, repr(error))
+
+def _alias_errors(result, index):
+    return [e for e in (result or {}).get('errors') or [] if (e.get('path') or [None])[0] == f"r{index}"]
+
+async def collect_repos_batched(session, semaphore, repos, output_dir, concurrency, max_batch_size):
+    """Coleta os repositórios pedindo a próxima página de vários deles na mesma query
+    (aliases r0, r1, ...). O tamanho do lote se adapta ao custo e ao tempo de resposta.
+
+    Com o cache HTTP gravando ou reproduzindo, os lotes precisam sair iguais nas duas
+    execuções (as chaves do cache dependem deles): o tamanho fica fixo em `max_batch_size`,
+    um único worker monta os lotes na ordem da fila e um lote que falha é repetido igual."""
+    state = get_crawl_state()
+    pending = deque()
+    results = []
+    for repo in by_cost(repos):
+        crawl = RepoCrawl(repo, output_dir, state)
+        if not crawl.start():
+            results.append(0)
+        elif crawl.done:
+            results.append(crawl.save())
+        else:
+            pending.append(crawl)
+    pinned = get_http_cache().mode in ('record', 'replay')
+    batch_size = AdaptiveBatchSize(max_batch_size, initial=max_batch_size if pinned else None, adaptive=not pinned)
+
+    async def worker():
+        while pending:
+            batch = [pending.popleft() for _ in range(min(batch_size.size, len(pending)))]
+            query, variables = build_batch_query([(c.owner, c.name, c.after_cursor) for c in batch])
+            started = time.monotonic()
+            try:
+                result = await run_graphql_query_async(session, semaphore, query, variables,
+                                                       max_attempts=BATCH_MAX_ATTEMPTS)
+            except Exception as e:
+                batch_size.failure(len(batch))
+                print(f"\nLote de {len(batch)} repositórios falhou ({e!r}). Lote reduzido para {batch_size.size}.")
+                retry = []
+                for crawl in batch:
+                    crawl.failures += 1
+                    if crawl.failures >= MAX_REPO_FAILURES:
+                        crawl.fail(e)
+                        results.append(0)
+                    else:
+                        retry.append(crawl)
+                if pinned:
+                    pending.extendleft(reversed(retry))
+                else:
+                    pending.extend(retry)
+                continue
+
+            elapsed = time.monotonic() - started
+            batch_size.success(len(batch), elapsed, query_cost(result))
+            # O tempo da query em lote é dividido entre os repositórios do lote
+            for crawl in batch:
+                METRICS.inc('repo_phase_seconds_total', elapsed / len(batch), repo=crawl.repo_name_full, phase='fetch')
+            for i, (crawl, pr_data) in enumerate(zip(batch, demultiplex(result, len(batch)))):
+                if pr_data is None:
+                    crawl.fail(Exception(f"Repositório sem dados na resposta: {_alias_errors(result, i) or 'alias nulo'}"))
+                    results.append(0)
+                    continue
+                crawl.add_page(pr_data)
+                if crawl.done:
+                    results.append(crawl.save())
+                else:
+                    pending.append(crawl)
+
+    await asyncio.gather(*[worker() for _ in range(1 if pinned else concurrency)])
+    return results
+
+async def collect_repos(repos, output_dir, concurrency=16, max_batch_size=0, incremental=False):
+    """Coleta todos os repositórios com uma única sessão HTTP e no máximo
+    `concurrency` queries simultâneas. Com `max_batch_size` > 0 usa queries em lote
+    (exceto no modo incremental). Retorna a lista de PRs salvos por repositório."""
+    if not len(TOKEN_POOL) and get_http_cache().mode != 'replay':
+        raise Exception("Token do GitHub não encontrado.")
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        if max_batch_size > 0 and incremental:
+            print("AVISO: o modo incremental não usa queries em lote; coletando por repositório.")
+        elif max_batch_size > 0 and get_source() == 'search':
+            print("AVISO: a fonte 'search' não usa queries em lote; coletando por repositório.")
+        elif max_batch_size > 0:
+            return await collect_repos_batched(session, semaphore, repos, output_dir,
+                                               concurrency, max_batch_size)
+        # Cada tarefa pega o próximo repositório da fila (maiores primeiro) ao terminar o anterior
+        results = []
+        completions = as_completed_by_cost(
+            lambda repo: process_and_save_repo_async(session, semaphore, repo, output_dir, incremental),
+            repos, concurrency, should_retry=lambda repo, _: repo_failed(repo))
+        async for repo, count, error in completions:
+            if error is not None:
+                get_crawl_state().fail(repo_full_name(repo), error)
+                count = 0
+            results.append(count)
+            report_progress(repo, count, len(results), len(repos))
+        return results
+
+def run_async_collection(repos, output_dir, concurrency=16, max_batch_size=0, incremental=False):
+    """Ponto de entrada síncrono usado por main()."""
+    return asyncio.run(collect_repos(repos, output_dir, concurrency=concurrency,
+                                     max_batch_size=max_batch_size, incremental=incremental))
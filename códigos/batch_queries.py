@@ -0,0 +1,82 @@
+from query_planner import PR_FIELDS_FRAGMENT, PR_PAGE_SIZE
+
+# --- CONFIGURAÇÕES ---
+MAX_BATCH_SIZE = 20
+# Resposta mais lenta que isto faz o lote diminuir
+TARGET_LATENCY = 10.0
+# Custo máximo (pontos) aceito para uma única query em lote
+MAX_BATCH_COST = 10
+
+_REPO_BLOCK = """
+  r%(i)d: repository(owner: $o%(i)d, name: $n%(i)d) {
+    pullRequests(first: %(page_size)d, after: $c%(i)d, states: [MERGED, CLOSED], orderBy: {field: CREATED_AT, direction: DESC}) {
+      nodes { ...PrFields }
+      pageInfo { endCursor, hasNextPage }
+    }
+  }"""
+
+
+def build_batch_query(cursors):
+    """Monta um único documento GraphQL com a próxima página de vários repositórios.
+
+    `cursors` é uma lista de (owner, name, after_cursor). Cada repositório vira um
+    alias `r<i>` com suas próprias variáveis, na mesma ordem da lista.
+    """
+    params = []
+    blocks = []
+    variables = {}
+    for i, (owner, name, after_cursor) in enumerate(cursors):
+        params.append(f"$o{i}: String!, $n{i}: String!, $c{i}: String")
+        blocks.append(_REPO_BLOCK % {'i': i, 'page_size': PR_PAGE_SIZE})
+        variables.update({f"o{i}": owner, f"n{i}": name, f"c{i}": after_cursor})
+    query = (f"query BatchPullRequests({', '.join(params)}) {{"
+             + "".join(blocks)
+             + "\n  rateLimit { cost remaining resetAt limit }\n}\n"
+             + PR_FIELDS_FRAGMENT)
+    return query, variables
+
+
+def demultiplex(result, count):
+    """Separa a resposta em lote na página `pullRequests` de cada repositório.
+
+    Retorna uma lista com `count` itens, na ordem de build_batch_query; um item é
+    None quando aquele alias veio nulo (repositório inexistente, erro parcial etc.).
+    """
+    data = (result or {}).get('data') or {}
+    pages = []
+    for i in range(count):
+        repo_data = data.get(f"r{i}")
+        pages.append(repo_data.get('pullRequests') if repo_data else None)
+    return pages
+
+
+def query_cost(result):
+    rate_limit = ((result or {}).get('data') or {}).get('rateLimit') or {}
+    return rate_limit.get('cost')
+
+
+class AdaptiveBatchSize:
+    """Ajusta quantos repositórios vão em cada query (aumento aditivo, redução multiplicativa).
+
+    Cresce de um em um enquanto as respostas chegam abaixo de TARGET_LATENCY e o custo
+    fica dentro de MAX_BATCH_COST; cai pela metade em respostas lentas ou falhas.
+    Com `adaptive=False` fica fixo.
+    """
+
+    def __init__(self, max_size=MAX_BATCH_SIZE, initial=None, adaptive=True):
+        self.max_size = max(1, max_size)
+        self.size = min(self.max_size, initial or max(1, self.max_size // 2))
+        self.adaptive = adaptive
+
+    def success(self, size, elapsed, cost=None):
+        if not self.adaptive:
+            return
+        if elapsed > TARGET_LATENCY or (cost is not None and cost > MAX_BATCH_COST):
+            self.size = max(1, min(self.size, size) // 2)
+        elif size >= self.size:
+            self.size = min(self.max_size, self.size + 1)
+
+    def failure(self, size):
+        if not self.adaptive:
+            return
+        self.size = max(1, min(self.size, size) // 2)
@@ -0,0 +1,150 @@
+import glob
+import hashlib
+import json
+import os
+import pickle
+import struct
+
+# --- CONFIGURAÇÕES ---
+CACHE_DIR = os.getenv('ANALYSIS_CACHE_DIR', '.analysis_cache')
+MAX_CACHE_BYTES = int(float(os.getenv('ANALYSIS_CACHE_MAX_MB', '512')) * 2**20)
+_FINGERPRINT_INDEX = 'fingerprints.json'
+_MISSING = object()
+
+
+def _hash_file(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _parquet_footer_hash(path):
+    """Hash do rodapé do Parquet (esquema, row groups e estatísticas), sem ler os dados."""
+    with open(path, 'rb') as f:
+        f.seek(-8, os.SEEK_END)
+        footer_length = struct.unpack('<i', f.read(4))[0]
+        f.seek(-8 - footer_length, os.SEEK_END)
+        return hashlib.blake2b(f.read(footer_length + 8), digest_size=16).hexdigest()
+
+
+def dataset_fingerprint(path, cache_dir=CACHE_DIR):
+    """Identificador do conteúdo do dataset.
+
+    CSVs têm o conteúdo inteiro hasheado, com o resultado guardado por (tamanho, mtime)
+    para não reler o arquivo enquanto ele não mudar; Parquets usam só o rodapé de
+    metadados; diretórios (de Parquets ou de CSVs por repositório) combinam os
+    identificadores de cada arquivo.
+    """
+    if os.path.isdir(path):
+        files = sorted(glob.glob(os.path.join(path, '*.parquet'))) or sorted(glob.glob(os.path.join(path, '*.csv')))
+        parts = [f"{os.path.basename(f)}:{digest}" for f, digest in zip(files, file_fingerprints(files, cache_dir))]
+        return hashlib.blake2b('\n'.join(parts).encode(), digest_size=16).hexdigest()
+    return file_fingerprints([path], cache_dir)[0]
+
+
+def file_fingerprints(paths, cache_dir=CACHE_DIR):
+    """Identificadores de vários arquivos de uma vez: o índice de hashes dos CSVs é lido
+    uma vez e regravado uma vez, só se algum arquivo mudou."""
+    index_path = os.path.join(cache_dir, _FINGERPRINT_INDEX)
+    index = None
+    changed = False
+    digests = []
+    for path in paths:
+        if path.endswith('.parquet'):
+            digests.append(_parquet_footer_hash(path))
+            continue
+        if index is None:
+            try:
+                with open(index_path, encoding='utf-8') as f:
+                    index = json.load(f)
+            except (FileNotFoundError, ValueError):
+                index = {}
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        entry = index.get(key)
+        if not (entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns):
+            entry = index[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': _hash_file(path)}
+            changed = True
+        digests.append(entry['digest'])
+
+    if changed:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_path)
+    return digests
+
+
+class ComputeCache:
+    """Cache em disco de resultados de análise (quantis, índices de linhas filtradas,
+    agregados), com chave = identificador do dataset + tipo + parâmetros.
+
+    Cada entrada é um pickle; o mtime do arquivo marca o último uso, e ao passar de
+    `max_bytes` as entradas usadas há mais tempo são removidas (LRU).
+    """
+
+    def __init__(self, fingerprint, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.fingerprint = fingerprint
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, kind, params):
+        key = repr((self.fingerprint, kind, params)).encode()
+        return os.path.join(self.cache_dir, f"{kind}-{hashlib.blake2b(key, digest_size=16).hexdigest()}.pkl")
+
+    def get(self, kind, params, default=None):
+        """Valor em cache ou `default`."""
+        path = self._path(kind, params)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return default
+        os.utime(path)
+        self.hits += 1
+        return value
+
+    def put(self, kind, params, value, evict=True):
+        """Guarda o valor; com `evict=False` a limpeza do cache fica para uma chamada
+        posterior de evict() (várias gravações em sequência)."""
+        path = self._path(kind, params)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        if evict:
+            self.evict()
+
+    def memoize(self, kind, params, compute):
+        """Devolve o valor em cache ou calcula com `compute()` e guarda."""
+        value = self.get(kind, params, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(kind, params, value)
+        return value
+
+    def evict(self):
+        """Remove as entradas usadas há mais tempo até o cache caber em `max_bytes`."""
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, '*.pkl')):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,190 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+# --- CONFIGURAÇÕES ---
+CRAWL_STATE_DB = os.getenv("CRAWL_STATE_DB", "crawl_state.sqlite")
+# Depois de tantas falhas o repositório deixa de ser tentado automaticamente
+MAX_REPO_ATTEMPTS = 5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    repo TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    end_cursor TEXT,
+    fetched INTEGER NOT NULL DEFAULT 0,
+    valid INTEGER NOT NULL DEFAULT 0,
+    saved INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at TEXT NOT NULL,
+    high_water TEXT,
+    refresh_from TEXT,
+    page_size INTEGER
+);
+CREATE TABLE IF NOT EXISTS pages (
+    repo TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    end_cursor TEXT,
+    raw_count INTEGER NOT NULL,
+    rows TEXT NOT NULL,
+    high_water TEXT,
+    PRIMARY KEY (repo, page)
+);
+CREATE TABLE IF NOT EXISTS seen_prs (
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    PRIMARY KEY (repo, number)
+);
+"""
+# Colunas adicionadas depois da primeira versão do banco
+_MIGRATIONS = {
+    'repos': {'high_water': 'TEXT', 'refresh_from': 'TEXT', 'valid': 'INTEGER NOT NULL DEFAULT 0',
+              'page_size': 'INTEGER'},
+    'pages': {'high_water': 'TEXT'},
+}
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+class CrawlState:
+    """Estado da coleta em SQLite: status, último `endCursor`, tentativas e erro de
+    cada repositório, além das linhas já processadas de cada página.
+
+    Cada página é gravada numa transação junto com o novo cursor, então uma coleta
+    interrompida retoma da página seguinte sem refazer as anteriores.
+
+    Para o modo incremental guarda também o maior `updatedAt` já visto (high water)
+    e os números dos PRs já incluídos no CSV, evitando duplicados.
+    """
+
+    def __init__(self, path=CRAWL_STATE_DB):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            for table, columns in _MIGRATIONS.items():
+                existing = {row['name'] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+                for column, column_type in columns.items():
+                    if column not in existing:
+                        self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+    def get(self, repo):
+        row = self._conn.execute("SELECT * FROM repos WHERE repo = ?", (repo,)).fetchone()
+        return dict(row) if row else None
+
+    def should_skip(self, repo, filepath, incremental=False):
+        """True se o repositório já foi concluído (ou desistido após MAX_REPO_ATTEMPTS).
+        No modo incremental os concluídos não são pulados: recebem uma atualização."""
+        record = self.get(repo)
+        if record is None:
+            # CSV de uma execução anterior ao controle de estado
+            return os.path.exists(filepath) and not incremental
+        if record['status'] == 'done':
+            return not incremental
+        return record['status'] == 'failed' and record['attempts'] >= MAX_REPO_ATTEMPTS
+
+    def retryable(self, repo):
+        """True se a última tentativa falhou e ainda restam tentativas."""
+        record = self.get(repo)
+        return record is not None and record['status'] == 'failed' and record['attempts'] < MAX_REPO_ATTEMPTS
+
+    def start(self, repo, incremental=False):
+        """Marca o repositório como em andamento e devolve (cursor, PRs já buscados, páginas salvas,
+        refresh_from, PRs válidos já salvos). `refresh_from` é o high water a partir do qual a
+        atualização incremental busca PRs, ou None para uma coleta completa."""
+        with self._lock, self._conn:
+            record = self._conn.execute("SELECT status, high_water FROM repos WHERE repo = ?", (repo,)).fetchone()
+            if record is not None and record['status'] == 'done':
+                # Nova passada sobre um repositório concluído: começa do início. Sem high water
+                # (coletado antes do modo incremental) a passada é completa e refaz o CSV.
+                self._conn.execute("DELETE FROM pages WHERE repo = ?", (repo,))
+                self._conn.execute(
+                    "UPDATE repos SET end_cursor = NULL, fetched = 0, valid = 0, attempts = 0, refresh_from = ? "
+                    "WHERE repo = ?",
+                    (record['high_water'] if incremental else None, repo))
+                if record['high_water'] is None:
+                    self._conn.execute("DELETE FROM seen_prs WHERE repo = ?", (repo,))
+            self._conn.execute(
+                "INSERT INTO repos (repo, status, attempts, updated_at) VALUES (?, 'in_progress', 1, ?) "
+                "ON CONFLICT(repo) DO UPDATE SET status = 'in_progress', attempts = attempts + 1, "
+                "error = NULL, updated_at = excluded.updated_at",
+                (repo, _now()))
+            record = self._conn.execute(
+                "SELECT end_cursor, fetched, valid, refresh_from, "
+                "(SELECT COUNT(*) FROM pages WHERE pages.repo = repos.repo) AS pages "
+                "FROM repos WHERE repo = ?", (repo,)).fetchone()
+        return record['end_cursor'], record['fetched'], record['pages'], record['refresh_from'], record['valid']
+
+    def unseen(self, repo, numbers):
+        """Filtra os números de PR que ainda não estão no CSV do repositório."""
+        seen = {number for (number,) in self._conn.execute(
+            "SELECT number FROM seen_prs WHERE repo = ?", (repo,))}
+        return [n for n in numbers if n not in seen]
+
+    def save_page(self, repo, end_cursor, raw_count, rows, numbers=(), high_water=None, valid=0):
+        """Grava as linhas válidas de uma página (`valid` linhas) e avança o cursor na mesma transação."""
+        with self._lock, self._conn:
+            page = self._conn.execute("SELECT COUNT(*) FROM pages WHERE repo = ?", (repo,)).fetchone()[0]
+            self._conn.execute(
+                "INSERT INTO pages (repo, page, end_cursor, raw_count, rows, high_water) VALUES (?, ?, ?, ?, ?, ?)",
+                (repo, page, end_cursor, raw_count, json.dumps(rows), high_water))
+            self._conn.executemany("INSERT OR IGNORE INTO seen_prs (repo, number) VALUES (?, ?)",
+                                   [(repo, number) for number in numbers])
+            self._conn.execute("UPDATE repos SET end_cursor = ?, fetched = fetched + ?, valid = valid + ?, "
+                               "updated_at = ? WHERE repo = ?",
+                               (end_cursor, raw_count, valid, _now(), repo))
+
+    def load_pages(self, repo):
+        """Linhas gravadas em cada página, na ordem da coleta (como foram passadas a save_page)."""
+        return [json.loads(page_rows) for (page_rows,) in
+                self._conn.execute("SELECT rows FROM pages WHERE repo = ? ORDER BY page", (repo,))]
+
+    def finish(self, repo, saved):
+        """Conclui o repositório; as páginas intermediárias deixam de ser necessárias."""
+        with self._lock, self._conn:
+            page_high_water = self._conn.execute(
+                "SELECT MAX(high_water) FROM pages WHERE repo = ?", (repo,)).fetchone()[0]
+            self._conn.execute(
+                "UPDATE repos SET status = 'done', saved = ?, error = NULL, updated_at = ?, refresh_from = NULL, "
+                "high_water = CASE WHEN high_water IS NULL OR high_water < ? THEN ? ELSE high_water END "
+                "WHERE repo = ?",
+                (saved, _now(), page_high_water, page_high_water, repo))
+            self._conn.execute("DELETE FROM pages WHERE repo = ?", (repo,))
+
+    def page_size(self, repo):
+        """Último tamanho de página de PRs usado no repositório (None se nunca foi coletado)."""
+        record = self._conn.execute("SELECT page_size FROM repos WHERE repo = ?", (repo,)).fetchone()
+        return record['page_size'] if record else None
+
+    def set_page_size(self, repo, size):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE repos SET page_size = ? WHERE repo = ?", (size, repo))
+
+    def fail(self, repo, error):
+        """Registra a falha mantendo as páginas já salvas para a próxima execução."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE repos SET status = 'failed', error = ?, updated_at = ? WHERE repo = ?",
+                               (str(error), _now(), repo))
+
+    def summary(self):
+        return dict(self._conn.execute("SELECT status, COUNT(*) FROM repos GROUP BY status").fetchall())
+
+
+_STATE = None
+_STATE_PID = None
+
+def get_crawl_state():
+    """Conexão do processo atual (cada processo do Pool abre a sua)."""
+    global _STATE, _STATE_PID
+    if _STATE is None or _STATE_PID != os.getpid():
+        _STATE = CrawlState()
+        _STATE_PID = os.getpid()
+    return _STATE
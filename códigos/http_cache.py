@@ -0,0 +1,132 @@
+import glob
+import gzip
+import hashlib
+import json
+import os
+import time
+
+# --- CONFIGURAÇÕES ---
+# Modos do cache de respostas da API:
+#   off    - sem cache (padrão)
+#   use    - devolve a resposta guardada se ainda válida; senão consulta a API e guarda
+#   record - sempre consulta a API e guarda a resposta (regrava o cache)
+#   replay - só respostas guardadas, sem validade e sem rede; uma query sem resposta
+#            guardada é um erro (re-execução offline)
+CACHE_MODES = ('off', 'use', 'record', 'replay')
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", ".http_cache")
+HTTP_CACHE_TTL_HOURS = float(os.getenv("HTTP_CACHE_TTL_HOURS", "24"))
+HTTP_CACHE_MAX_BYTES = int(float(os.getenv("HTTP_CACHE_MAX_MB", "256")) * 2**20)
+# Gravações entre duas verificações do tamanho total do cache
+_EVICT_EVERY = 64
+
+
+class CacheMiss(Exception):
+    """Query sem resposta guardada no modo replay."""
+
+
+def _digest(data):
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+class HttpCache:
+    """Respostas JSON da API em disco, comprimidas (gzip), com chave = hash da query +
+    hash das variáveis.
+
+    O mtime de cada arquivo marca o último uso: vale para a validade (TTL, contada a partir
+    da gravação, guardada no próprio arquivo) e para a remoção das entradas usadas há mais
+    tempo quando o cache passa de `max_bytes`. Só respostas sem `errors` são guardadas.
+    """
+
+    def __init__(self, mode='off', cache_dir=HTTP_CACHE_DIR, ttl_hours=HTTP_CACHE_TTL_HOURS,
+                 max_bytes=HTTP_CACHE_MAX_BYTES):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Modo de cache desconhecido: {mode}")
+        self.mode = mode
+        self.cache_dir = cache_dir
+        self.ttl = ttl_hours * 3600
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        if mode != 'off':
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return self.mode != 'off'
+
+    def _path(self, query, variables):
+        key = f"{_digest(query)}-{_digest(json.dumps(variables or {}, sort_keys=True))}"
+        return os.path.join(self.cache_dir, f"{key}.json.gz")
+
+    def get(self, query, variables):
+        """Resposta guardada para (query, variáveis), ou None se não houver ou se o modo pede
+        uma nova consulta. No modo replay a falta de resposta levanta CacheMiss."""
+        if self.mode == 'off':
+            return None
+        if self.mode == 'record':
+            # Toda query vai para a API
+            self.misses += 1
+            return None
+        path = self._path(query, variables)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, EOFError, OSError, ValueError):
+            entry = None
+        if entry is not None and (self.mode == 'replay' or time.time() - entry['stored_at'] <= self.ttl):
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+            self.hits += 1
+            return entry['response']
+
+        self.misses += 1
+        if self.mode == 'replay':
+            raise CacheMiss(f"Sem resposta gravada para a query ({os.path.basename(path)}).")
+        return None
+
+    def put(self, query, variables, response):
+        if self.mode not in ('use', 'record') or not response or 'errors' in response:
+            return
+        path = self._path(query, variables)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump({'stored_at': time.time(), 'response': response}, f)
+        os.replace(tmp_path, path)
+        self._writes += 1
+        if self._writes % _EVICT_EVERY == 0:
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, '*.json.gz')):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def summary(self):
+        return f"cache HTTP ({self.mode}): {self.hits} respostas reaproveitadas, {self.misses} consultas à API"
+
+
+_CACHE = HttpCache(os.getenv("HTTP_CACHE", "off"))
+
+def configure(mode):
+    """Define o modo do cache (chamado por main() antes de iniciar os workers)."""
+    global _CACHE
+    _CACHE = HttpCache(mode)
+
+def get_http_cache():
+    return _CACHE
@@ -0,0 +1,188 @@
+"""Backend de análise fora da memória: as condições das RQs, os cortes por quantil, a
+coluna derivada size_total_lines e as medianas por status viram consultas SQL do DuckDB
+sobre o arquivo (CSV ou Parquet) ou o diretório de arquivos por repositório, sem carregar
+o dataset no pandas.
+
+O DuckDB lê só as colunas usadas em cada consulta, executa em várias threads e grava em
+disco (TEMP_DIR) o que não couber em ANALYSIS_MEMORY_LIMIT. Só o resultado final de
+`filtered` (as colunas pedidas das linhas filtradas) vira DataFrame, com os tipos do
+esquema, para os gráficos. CSVs são lidos uma única vez por processo para uma tabela
+do DuckDB (comprimida e também sujeita ao limite de memória); Parquets são consultados
+direto no arquivo.
+
+A interface é a mesma de analysis.AnalysisData (quantile, filtered, median_table,
+spearman), inclusive o cache em disco de compute_cache.
+"""
+import glob
+import os
+
+import duckdb
+import pandas as pd
+
+from compute_cache import ComputeCache, dataset_fingerprint
+from storage import COLUMNS, SCHEMA
+
+# --- CONFIGURAÇÕES ---
+THREADS = int(os.getenv('ANALYSIS_THREADS', '0')) or os.cpu_count()
+MEMORY_LIMIT = os.getenv('ANALYSIS_MEMORY_LIMIT')  # ex.: '4GB'; padrão do DuckDB = 80% da RAM
+TEMP_DIR = os.getenv('ANALYSIS_TEMP_DIR', os.path.join('.analysis_cache', 'duckdb_tmp'))
+
+_SQL_TYPES = {'category': 'VARCHAR', 'float64': 'DOUBLE', 'int32': 'INTEGER'}
+_NUMERIC = [c for c in COLUMNS if c not in ('repository', 'status')]
+# Colunas da visão consultada: as originais usadas pela análise mais a derivada
+_VIEW_COLUMNS = ['status'] + _NUMERIC + ['size_total_lines']
+_OPERATORS = ('<', '<=')
+
+
+def _sql_type(column):
+    dtype = SCHEMA[column]
+    return 'VARCHAR' if isinstance(dtype, pd.CategoricalDtype) else _SQL_TYPES[str(dtype)]
+
+
+def _literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _csv_header(path):
+    with open(path, encoding='utf-8') as f:
+        return f.readline().strip().split(',')
+
+
+def source_sql(path):
+    """Expressão FROM do DuckDB para o dataset: CSV, Parquet ou diretório de Parquets ou
+    de CSVs por repositório (CSVs vazios ou com outro cabeçalho são ignorados)."""
+    if os.path.isdir(path):
+        files = sorted(glob.glob(os.path.join(path, '*.parquet')))
+        if not files:
+            files = [f for f in sorted(glob.glob(os.path.join(path, '*.csv'))) if _csv_header(f) == COLUMNS]
+        if not files:
+            raise FileNotFoundError(f"Nenhum arquivo de dados em '{path}'")
+    elif os.path.exists(path):
+        files = [path]
+    else:
+        raise FileNotFoundError(path)
+
+    listing = '[' + ', '.join(_literal(f) for f in files) + ']'
+    if files[0].endswith('.parquet'):
+        return f"read_parquet({listing})"
+    types = ', '.join(f"{_literal(c)}: {_literal(_sql_type(c))}" for c in COLUMNS)
+    return f"read_csv({listing}, header = true, types = {{{types}}})"
+
+
+# Uma conexão por processo: os filhos do report.py (fork) não podem usar a do pai
+_CONNECTION = None
+_CONNECTION_PID = None
+
+def connect():
+    global _CONNECTION, _CONNECTION_PID
+    if _CONNECTION is None or _CONNECTION_PID != os.getpid():
+        os.makedirs(TEMP_DIR, exist_ok=True)
+        config = {'threads': THREADS, 'temp_directory': TEMP_DIR}
+        if MEMORY_LIMIT:
+            config['memory_limit'] = MEMORY_LIMIT
+        _CONNECTION = duckdb.connect(config=config)
+        _CONNECTION.execute("SET enable_progress_bar = false")
+        _CONNECTION_PID = os.getpid()
+    return _CONNECTION
+
+
+class DuckDBAnalysisData:
+    """Mesma interface de analysis.AnalysisData, com cada operação executada como
+    consulta do DuckDB sobre o dataset em disco."""
+
+    def __init__(self, path, use_cache=True):
+        self.path = path
+        self.source = source_sql(path)
+        self.cache = ComputeCache(dataset_fingerprint(path)) if use_cache else None
+        self._pid = None
+        self._quantiles = {}
+        self._views = {}
+        self._medians = None
+        self._correlations = {}
+        # Falha aqui (e não no primeiro gráfico) se o arquivo não tiver as colunas esperadas
+        connect().execute(f"SELECT status, {', '.join(_NUMERIC)} FROM {self.source} LIMIT 0")
+
+    def _query(self, sql, params=None):
+        con = connect()
+        if self._pid != os.getpid():
+            # Registrada na conexão deste processo. Parquet é lido direto a cada consulta
+            # (só as colunas usadas); CSV é convertido uma vez para uma tabela colunar do
+            # DuckDB, que vai para TEMP_DIR quando passa do limite de memória
+            kind = 'VIEW' if self.source.startswith('read_parquet') else 'TABLE'
+            con.execute(f"""
+                CREATE OR REPLACE TEMP {kind} prs AS
+                SELECT status, {', '.join(_NUMERIC)},
+                       CAST(size_additions AS BIGINT) + size_deletions AS size_total_lines
+                FROM {self.source}""")
+            self._pid = os.getpid()
+        return con.execute(sql, params or [])
+
+    def _memoize(self, kind, params, compute):
+        if self.cache is None:
+            return compute()
+        return self.cache.memoize(kind, params, compute)
+
+    def quantile(self, column, q):
+        key = (column, q)
+        if key not in self._quantiles:
+            # quantile_cont interpola como o pandas (método 'linear')
+            compute = lambda: float(self._query(f"SELECT quantile_cont({column}, ?) FROM prs", [q]).fetchone()[0])
+            self._quantiles[key] = self._memoize('quantile', key, compute)
+        return self._quantiles[key]
+
+    def _where(self, conditions):
+        clauses = []
+        params = []
+        for column, op, q in conditions:
+            if column not in _VIEW_COLUMNS or op not in _OPERATORS:
+                raise ValueError(f"Condição inválida: {(column, op, q)}")
+            clauses.append(f"{column} {op} ?")
+            params.append(self.quantile(column, q))
+        return ' AND '.join(clauses) or 'TRUE', params
+
+    def filtered(self, *conditions, columns=None):
+        """Colunas `columns` (padrão: todas) das linhas que atendem a todas as condições,
+        na ordem do dataset (a visão fica em cache; não altere)."""
+        key = (tuple(sorted(conditions)), tuple(columns or _VIEW_COLUMNS))
+        if key not in self._views:
+            where, params = self._where(key[0])
+            df = self._query(f"SELECT {', '.join(key[1])} FROM prs WHERE {where}", params).df()
+            self._views[key] = df.astype({c: SCHEMA[c] for c in key[1] if c in SCHEMA})
+        return self._views[key]
+
+    def median_table(self):
+        """Mediana de cada métrica por status, com os nomes da tabela final."""
+        if self._medians is None:
+            from analysis import TABLE_METRICS
+
+            def medians():
+                aggregates = ', '.join(f"median({c}) AS {c}" for c in TABLE_METRICS)
+                table = self._query(f"SELECT status, {aggregates} FROM prs GROUP BY status").df()
+                # Mesma ordem e índice do groupby do pandas sobre a coluna categórica
+                categories = SCHEMA['status'].categories
+                table = table.set_index('status').reindex([s for s in categories if s in set(table['status'])])
+                table.index = pd.CategoricalIndex(table.index, categories=categories, name='status')
+                return table.astype('float64').rename(columns=TABLE_METRICS)
+            self._medians = self._memoize('median_table', tuple(TABLE_METRICS), medians)
+        return self._medians
+
+    def spearman(self, columns=_NUMERIC):
+        """Matriz de correlação de Spearman: Pearson dos postos médios (empates recebem a
+        média dos postos, como no pandas). Os postos saem de uma contagem por valor
+        distinto de cada coluna, ligada de volta às linhas por hash join, sem ordenar o
+        dataset inteiro."""
+        key = tuple(columns)
+        if key not in self._correlations:
+            def matrix():
+                ranks = ', '.join(f"r{i} AS (SELECT {c} AS value, sum(count(*)) OVER (ORDER BY {c}) - (count(*) - 1) / 2.0 AS rank "
+                                  f"FROM prs GROUP BY {c})" for i, c in enumerate(columns))
+                joins = ' '.join(f"JOIN r{i} ON prs.{c} = r{i}.value" for i, c in enumerate(columns))
+                pairs = [(i, j) for i in range(len(columns)) for j in range(i + 1, len(columns))]
+                row = self._query(f"WITH {ranks} SELECT " + ', '.join(f"corr(r{i}.rank, r{j}.rank)" for i, j in pairs)
+                                  + f" FROM prs {joins}").fetchone()
+                corr = pd.DataFrame(1.0, index=list(columns), columns=list(columns))
+                for (i, j), value in zip(pairs, row):
+                    corr.iloc[i, j] = corr.iloc[j, i] = value
+                return corr
+            self._correlations[key] = self._memoize('spearman', key, matrix)
+        return self._correlations[key]
@@ -1,229 +1,636 @@
+import argparse
+import csv
 import requests
 import time
 import os
 import pandas as pd
-from datetime import datetime, timezone
-from multiprocessing import Pool, cpu_count
+from multiprocessing import cpu_count, get_all_start_methods
 from functools import partial
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 import glob
 import random
 
+from rate_limit import RateLimitError, check_rate_limit
+from crawl_state import get_crawl_state
+from batch_queries import query_cost
+from http_cache import CACHE_MODES, configure as configure_http_cache, get_http_cache
+from metrics import METRICS, PROFILERS, configure_profiler, print_metrics_report, profile_call, profiled
+from pr_records import PrRecords
+from repo_index import ORDER_BY, SEARCH_RESULT_CAP, get_repo_index, shard_query
+from scheduler import imap_by_cost
+from query_planner import (PAGE_MAX_ATTEMPTS, PR_SOURCES, AdaptivePageSize, PageTimeoutError,
+                           configure as configure_query_planner, extract_pr_page, max_raw_prs, plan_pr_page)
+from storage import COLUMNS, SCHEMA, configure as configure_storage, get_storage, to_typed_frame
+from token_pool import TOKEN_POOL, merge_usage, print_usage_report
+
 # --- CONFIGURAÇÕES ---
-GITHUB_TOKEN = os.getenv("TOKEN")
-GITHUB_API_URL = 'https://api.github.com/graphql'
-OUTPUT_DIR = "resultados_csv"
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", 'https://api.github.com/graphql')
 
 # --- QUERIES GraphQL ---
 GET_TOP_REPOS_QUERY = """
-query GetTopRepos($afterCursor: String) {
-  search(query: "sort:stars-desc is:public", type: REPOSITORY, first: 100, after: $afterCursor) {
+query GetTopRepos($searchQuery: String!, $afterCursor: String) {
+  search(query: $searchQuery, type: REPOSITORY, first: 100, after: $afterCursor) {
+    repositoryCount
     nodes {
       ... on Repository {
         owner { login }
         name
+        stargazerCount
         pullRequests(states: [MERGED, CLOSED]) { totalCount }
       }
     }
     pageInfo { endCursor, hasNextPage }
   }
+  rateLimit { cost remaining resetAt limit }
 }
 """
-GET_PULL_REQUESTS_QUERY = """
-query GetPullRequests($owner: String!, $name: String!, $afterCursor: String) {
-  repository(owner: $owner, name: $name) {
-    pullRequests(first: 40, after: $afterCursor, states: [MERGED, CLOSED], orderBy: {field: CREATED_AT, direction: DESC}) {
-      nodes {
-        state, createdAt, closedAt, mergedAt, additions, deletions, changedFiles, bodyText
-        participants(first: 1) { totalCount }
-        comments(first: 1) { totalCount }
-        reviews(first: 1) { totalCount }
-      }
-      pageInfo { endCursor, hasNextPage }
-    }
-  }
-}
-"""
+# Teto de PRs válidos novos por repositório numa atualização incremental
+INCREMENTAL_MAX_PRS = 5000
 
 # --- FUNÇÃO DE API COM EXPONENTIAL BACKOFF ---
-def run_graphql_query(query, variables=None):
-    """Executa uma query GraphQL com lógica de retentativa 'exponential backoff'."""
-    if not GITHUB_TOKEN:
+MAX_RATE_LIMIT_WAITS = 10
+
+def run_graphql_query(query, variables=None, max_attempts=7, timing=None):
+    """Executa uma query GraphQL pelo token com mais orçamento, respeitando o limite de taxa
+    e com 'exponential backoff' para erros de rede (até `max_attempts` tentativas). Com o
+    cache HTTP ativo (http_cache) a resposta guardada é devolvida sem consultar a API.
+    Se `timing` for um dicionário, timing['seconds'] recebe a duração da requisição que
+    respondeu, sem as esperas pelo limite de taxa."""
+    cache = get_http_cache()
+    cached = cache.get(query, variables)
+    if cached is not None:
+        METRICS.inc('graphql_cache_hits_total')
+        return cached
+    if not len(TOKEN_POOL):
         raise Exception("Token do GitHub não encontrado.")
-    headers = {'Authorization': f'bearer {GITHUB_TOKEN}', 'Content-Type': 'application/json'}
     request_body = {'query': query, 'variables': variables or {}}
     
-    max_attempts = 7
-    for attempt in range(max_attempts):
+    attempt = 0
+    rate_limit_waits = 0
+    while True:
+        token = TOKEN_POOL.acquire()
+        token.scheduler.wait(cost_key=query)
+        started = time.perf_counter()
         try:
-            response = requests.post(GITHUB_API_URL, headers=headers, json=request_body, timeout=90)
+            response = requests.post(GITHUB_API_URL, headers=token.headers, json=request_body, timeout=90)
+            elapsed = time.perf_counter() - started
+            if timing is not None:
+                timing['seconds'] = elapsed
+            METRICS.observe('graphql_request_seconds', elapsed, engine='sync', status=response.status_code)
+            METRICS.inc('graphql_response_bytes_total', len(response.content))
+            try:
+                json_response = response.json()
+            except ValueError:
+                json_response = None
+            METRICS.inc('graphql_cost_points_total', query_cost(json_response) or 0)
+            token.scheduler.update(response.headers, json_response, cost_key=query)
+            check_rate_limit(response.status_code, response.headers, json_response)
+
+            if response.status_code == 401:
+                # Token revogado/expirado: sai da rotação e a query é refeita com outro
+                TOKEN_POOL.revoke(token, f"HTTP {response.status_code}")
+                METRICS.inc('retries_total', cause='unauthorized')
+                continue
             
             if response.status_code in [502, 504]:
                 print(f"\nServidor retornou {response.status_code}. Nova tentativa em andamento...")
-                response.raise_for_status()
 
             response.raise_for_status()
-            json_response = response.json()
+            if json_response is None:
+                raise requests.exceptions.RequestException("Resposta sem JSON válido.")
             if 'errors' in json_response:
                 print(f"\nErro na query GraphQL: {json_response['errors']}")
+            cache.put(query, variables, json_response)
             return json_response
 
+        except RateLimitError as e:
+            token.rate_limited += 1
+            rate_limit_waits += 1
+            METRICS.inc('retries_total', cause='rate_limit')
+            if rate_limit_waits > MAX_RATE_LIMIT_WAITS * len(TOKEN_POOL):
+                print(f"\nLimite de taxa persistente após {rate_limit_waits - 1} esperas.")
+                raise
+            wait_time = token.scheduler.pause(e)
+            print(f"\nLimite de taxa atingido em {token.label} ({e}). Token pausado por {wait_time:.0f} segundos...")
+
         except requests.exceptions.RequestException as e:
-            if attempt < max_attempts - 1:
-                wait_time = (2 ** attempt) + random.random()
+            token.errors += 1
+            attempt += 1
+            METRICS.inc('retries_total', cause=request_error_cause(e))
+            if isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+                METRICS.observe('graphql_request_seconds', time.perf_counter() - started,
+                                engine='sync', status='error')
+            if attempt < max_attempts:
+                wait_time = (2 ** (attempt - 1)) + random.random()
                 print(f"\nErro de rede ({e}). Tentando novamente em {wait_time:.2f} segundos...")
                 time.sleep(wait_time)
             else:
                 print(f"\nFalha na query após {max_attempts} tentativas.")
                 raise e
 
+def request_error_cause(error):
+    """Causa de uma nova tentativa após erro de rede/HTTP, para as métricas."""
+    if isinstance(error, requests.exceptions.Timeout):
+        return 'timeout'
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return f"http_{error.response.status_code}"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return 'connection'
+    return 'invalid_response'
+
 # --- FUNÇÕES DE COLETA DE DADOS ---
-def get_top_repos(total_to_fetch=200):
-    print(f"Iniciando coleta de {total_to_fetch} repositórios mais populares...")
+def fetch_search_shard(query, wanted):
+    """Busca até `wanted` repositórios (no máximo SEARCH_RESULT_CAP) de uma faixa de
+    estrelas e grava no índice local."""
     repo_nodes = []
     after_cursor = None
-    num_pages = (total_to_fetch + 99) // 100
+    exhausted = False
+    num_pages = (min(wanted, SEARCH_RESULT_CAP) + 99) // 100
     for page in range(num_pages):
-        print(f"Buscando página de repositórios {page + 1}/{num_pages}...")
-        result = run_graphql_query(GET_TOP_REPOS_QUERY, {"afterCursor": after_cursor})
+        print(f"Buscando página de repositórios {page + 1}/{num_pages} ({query})...")
+        result = run_graphql_query(GET_TOP_REPOS_QUERY, {"searchQuery": query, "afterCursor": after_cursor})
         search_data = result['data']['search']
-        repo_nodes.extend(search_data['nodes'])
+        repo_nodes.extend(n for n in search_data['nodes'] if n)
         after_cursor = search_data['pageInfo']['endCursor']
-        if not search_data['pageInfo']['hasNextPage']: break
-        time.sleep(1)
-    print(f"\nTotal de {len(repo_nodes)} repositórios encontrados.")
-    filtered_repos = [r for r in repo_nodes if r and r.get('pullRequests', {}).get('totalCount', 0) >= 100]
-    print(f"{len(filtered_repos)} repositórios atendem ao critério de >= 100 PRs.")
+        if not search_data['pageInfo']['hasNextPage']:
+            # Sem próxima página antes do teto da busca: a faixa acabou
+            total = search_data.get('repositoryCount')
+            exhausted = len(repo_nodes) >= total if total is not None else len(repo_nodes) < SEARCH_RESULT_CAP
+            break
+    get_repo_index().save_search(query, repo_nodes, exhausted)
+
+def _indexed_search(index, query, wanted, refresh):
+    """Registro da busca no índice, buscando na API se estiver vencida ou incompleta."""
+    shard = None if refresh else index.search(query)
+    if shard is None or (shard['results'] < wanted and not shard['exhausted']):
+        fetch_search_shard(query, wanted)
+        shard = index.search(query)
+    return shard
+
+def ensure_repo_index(needed, refresh=False):
+    """Garante no índice os `needed` repositórios com mais estrelas, buscando na API só as
+    faixas vencidas ou incompletas. Acima de 1000 resultados a busca continua na faixa
+    `stars:<N`, com N o menor número de estrelas da faixa anterior, depois de buscar à
+    parte (`stars:N`) todos os repositórios com exatamente N estrelas, que o limite pode
+    ter cortado. O total coberto é o de repositórios distintos no índice, sem contar duas
+    vezes os que aparecem em mais de uma faixa.
+    Retorna False se a busca acabou antes de chegar a `needed`."""
+    index = get_repo_index()
+    below = None
+    covered = 0
+    while True:
+        shard = _indexed_search(index, shard_query(below), min(SEARCH_RESULT_CAP, needed - covered), refresh)
+        if shard['min_stars'] is None:
+            return False
+        boundary = shard['min_stars']
+        if shard['exhausted']:
+            return index.count(min_stars=boundary) >= needed
+        if index.count(min_stars=boundary) < needed:
+            _indexed_search(index, shard_query(exact=boundary), SEARCH_RESULT_CAP, refresh)
+        covered = index.count(min_stars=boundary)
+        if covered >= needed:
+            return True
+        below = boundary
+
+def get_top_repos(total_to_fetch=200, min_prs=100, top_qualifying=None, order_by='stars', refresh=False):
+    """Repositórios a coletar, selecionados no índice local (repo_index).
+
+    Por padrão são os `total_to_fetch` mais populares que tenham ao menos `min_prs` PRs;
+    com `top_qualifying` são os N primeiros, segundo `order_by`, entre todos os que
+    atendem ao critério (a busca avança por faixas de estrelas até encontrá-los).
+    """
+    index = get_repo_index()
+    if top_qualifying:
+        print(f"Selecionando {top_qualifying} repositórios com >= {min_prs} PRs (ordem: {order_by})...")
+        needed = top_qualifying
+        while True:
+            complete = ensure_repo_index(needed, refresh)
+            filtered_repos = index.select(limit=top_qualifying, min_prs=min_prs, order_by=order_by)
+            if len(filtered_repos) >= top_qualifying or not complete:
+                break
+            needed *= 2
+            refresh = False
+        print(f"{len(filtered_repos)} repositórios selecionados entre {index.count()} do índice.")
+        return filtered_repos
+
+    print(f"Iniciando coleta de {total_to_fetch} repositórios mais populares...")
+    ensure_repo_index(total_to_fetch, refresh)
+    print(f"\nTotal de {min(total_to_fetch, index.count())} repositórios encontrados.")
+    filtered_repos = index.select(min_prs=min_prs, order_by=order_by, within_top=total_to_fetch)
+    print(f"{len(filtered_repos)} repositórios atendem ao critério de >= {min_prs} PRs.")
     return filtered_repos
 
+def newer_nodes(nodes, updated_after):
+    """No modo incremental, mantém só os PRs fechados depois do high water e indica se a
+    página já chegou aos conhecidos (a ordem é por `updatedAt` decrescente, e um PR fechado
+    depois do high water necessariamente foi atualizado depois dele)."""
+    if not updated_after:
+        return nodes, False
+    nodes = [n for n in nodes if n]
+    updated = [n for n in nodes if n['updatedAt'] > updated_after]
+    closed = [n for n in updated if (n['closedAt'] or '') > updated_after]
+    return closed, len(updated) < len(nodes)
+
 # --- MUDANÇA AQUI: Adicionado limite na coleta de PRs ---
-def get_prs_for_repo(owner, name, max_prs=200):
-    """Busca os pull requests de um repositório até atingir o limite max_prs."""
-    all_prs = []
-    after_cursor = None
+def get_prs_for_repo(owner, name, max_prs=200, after_cursor=None, fetched=0, on_page=None, updated_after=None,
+                     valid=0, pager=None):
+    """Busca os pull requests de um repositório até juntar max_prs PRs válidos (ou ler
+    max_raw_prs(max_prs) PRs no total).
+
+    Para retomar uma coleta, `after_cursor`, `fetched` e `valid` indicam onde a anterior parou;
+    `on_page(nodes, end_cursor, limit)` é chamado a cada página para gravar o checkpoint e
+    retorna quantos PRs válidos a página acrescentou (no máximo `limit`).
+    Com `updated_after` (modo incremental) os PRs vêm por `updatedAt` decrescente e a
+    paginação para no primeiro PR já conhecido.
+
+    O tamanho de cada página vem de `pager` (AdaptivePageSize): uma página que falha
+    (timeout, 5xx) é pedida de novo, do mesmo cursor, com o tamanho reduzido, e o tamanho
+    volta a crescer enquanto as respostas forem rápidas. O ritmo entre as páginas fica a
+    cargo do escalonador do token (orçamento de taxa), sem pausas fixas.
+    """
+    new_prs = 0
+    max_fetched = max_raw_prs(max_prs)
+    pager = pager or AdaptivePageSize()
     
     # Loop para buscar páginas de PRs
-    while True:
-        result = run_graphql_query(GET_PULL_REQUESTS_QUERY, {"owner": owner, "name": name, "afterCursor": after_cursor})
-        if not result: break
-        
-        repo_data = result.get('data', {}).get('repository')
-        if not repo_data or 'pullRequests' not in repo_data: break
-            
-        pr_data = repo_data['pullRequests']
-        all_prs.extend(pr_data['nodes'])
+    while valid < max_prs and fetched < max_fetched:
+        size = pager.size
+        query, variables = plan_pr_page(owner, name, after_cursor, updated_after, page_size=size)
+        timing = {}
+        try:
+            with METRICS.timer('repo_phase_seconds_total', repo=f"{owner}/{name}", phase='fetch'):
+                result = run_graphql_query(query, variables, max_attempts=PAGE_MAX_ATTEMPTS, timing=timing)
+            pr_data = extract_pr_page(result)
+        except (requests.exceptions.RequestException, PageTimeoutError) as e:
+            if not pager.failure(size):
+                raise
+            METRICS.inc('pr_page_failures_total')
+            print(f"  -> {owner}/{name}: página de {size} PRs falhou ({e}); nova tentativa com {pager.size}.")
+            continue
+        pager.success(size, timing.get('seconds', 0))
+        METRICS.observe('pr_page_size', size)
+
+        nodes, reached_known = newer_nodes(pr_data['nodes'], updated_after)
+        fetched += len(nodes)
+        new_prs += len(nodes)
+        if on_page:
+            with METRICS.timer('repo_phase_seconds_total', repo=f"{owner}/{name}", phase='parse'):
+                valid += on_page(nodes, pr_data['pageInfo']['endCursor'], max_prs - valid)
+        else:
+            valid += len(nodes)
+
+        if reached_known:
+            print(f"  -> {owner}/{name}: alcançou PRs já coletados, {new_prs} novos.")
+            break
 
-        # 1. Verifica se o limite foi atingido ou ultrapassado
-        if len(all_prs) >= max_prs:
-            print(f"  -> Limite de {max_prs} PRs atingido para {owner}/{name}.")
+        # 1. Verifica se o limite foi atingido
+        if valid >= max_prs:
+            print(f"  -> Limite de {max_prs} PRs válidos atingido para {owner}/{name}.")
             break # Interrompe o loop de paginação
             
         # Continua a paginação se houver mais páginas e o limite não foi atingido
         if not pr_data['pageInfo']['hasNextPage']:
             break
+        if fetched >= max_fetched:
+            print(f"  -> {owner}/{name}: {fetched} PRs lidos, {valid} válidos; parando a paginação.")
+            break
         after_cursor = pr_data['pageInfo']['endCursor']
-        time.sleep(0.5)
         
-    # 2. Retorna a lista cortada para garantir que não exceda o limite
-    return all_prs[:max_prs]
+    return new_prs
 # --- FIM DA MUDANÇA ---
 
-def process_and_save_repo(repo, output_dir):
-    """Processa um único repositório, pulando se o CSV já existir."""
+def repo_output_path(output_dir, owner, name):
+    """Caminho do arquivo individual de um repositório, no formato de armazenamento configurado."""
+    return os.path.join(output_dir, f"{owner}-{name}{get_storage().extension}")
+
+def build_valid_prs(prs, repo_name_full, numbers=None):
+    """Converte os nós de PR da API nas linhas do CSV (em colunas tipadas), descartando os PRs inválidos."""
+    return PrRecords(repo_name_full).add_nodes(prs, numbers)
+
+def save_repo_rows(valid_prs_for_repo, filepath, repo_name_full):
+    """Grava o arquivo de um repositório (vazio se não houver PRs válidos) e retorna o total salvo.
+
+    A escrita vai para um arquivo temporário renomeado no fim, para que uma interrupção
+    nunca deixe um arquivo pela metade.
+    """
+    tmp_path = filepath + '.tmp'
+    get_storage().write_repo(valid_prs_for_repo, tmp_path)
+    os.replace(tmp_path, filepath)
+    if len(valid_prs_for_repo):
+        print(f"SALVO: {repo_name_full} -> {len(valid_prs_for_repo)} PRs em '{filepath}'")
+        return len(valid_prs_for_repo)
+    else:
+        print(f"Finalizado: {repo_name_full} -> Nenhum PR válido. Arquivo vazio criado.")
+        return 0
+
+def start_repo(state, repo_name_full, filepath, incremental=False):
+    """Consulta o estado da coleta: retorna None se o repositório deve ser pulado,
+    senão (cursor, PRs já buscados, high water, PRs válidos já salvos) para começar ou
+    retomar a coleta.
+    O high water só vem preenchido numa atualização incremental."""
+    if state.should_skip(repo_name_full, filepath, incremental):
+        print(f"JÁ EXISTE: Pulando {repo_name_full}, já concluído em uma execução anterior.")
+        return None
+    after_cursor, fetched, pages, updated_after, valid = state.start(repo_name_full, incremental)
+    if pages:
+        print(f"Retomando: {repo_name_full} a partir da página {pages + 1} ({fetched} PRs já buscados, {valid} válidos)")
+    elif updated_after:
+        print(f"Atualizando: {repo_name_full} (PRs atualizados após {updated_after})")
+    else:
+        print(f"Iniciando: {repo_name_full}")
+    return after_cursor, fetched, updated_after, valid
+
+def make_checkpoint(state, repo_name_full):
+    """Callback on_page: grava as linhas dos PRs ainda não incluídos (no máximo `limit`) e o
+    novo cursor, e retorna quantas linhas foram gravadas.
+
+    Só os PRs tratados contam como vistos e entram no high water: as linhas mantidas e os
+    PRs descartados por inválidos antes da última delas. Os que sobraram depois do limite
+    continuam disponíveis para uma próxima atualização."""
+    def checkpoint(nodes, end_cursor, limit=None):
+        nodes = [n for n in nodes if n]
+        unseen = set(state.unseen(repo_name_full, [n['number'] for n in nodes]))
+        new_nodes = [n for n in nodes if n['number'] in unseen]
+        kept = []
+        records = build_valid_prs(new_nodes, repo_name_full, numbers=kept)
+        handled = nodes
+        if limit is not None and len(records) > limit:
+            records.truncate(limit)
+            last = kept[limit - 1] if limit else None
+            handled = nodes[:next(i for i, n in enumerate(nodes) if n['number'] == last) + 1] if limit else []
+        handled_numbers = {n['number'] for n in handled}
+        high_water = max((n['updatedAt'] for n in handled), default=None)
+        state.save_page(repo_name_full, end_cursor, len(nodes), records.to_json(),
+                        numbers=unseen & handled_numbers, high_water=high_water, valid=len(records))
+        return len(records)
+    return checkpoint
+
+def finish_repo(state, repo_name_full, filepath, merge=False):
+    """Gera o arquivo com todas as páginas salvas no estado e marca o repositório como concluído.
+    Com `merge` (atualização incremental) as linhas novas são somadas às do arquivo existente."""
+    with METRICS.timer('repo_phase_seconds_total', repo=repo_name_full, phase='write'):
+        records = PrRecords(repo_name_full)
+        for page in state.load_pages(repo_name_full):
+            records.extend(PrRecords.from_json(repo_name_full, page))
+        rows = records.to_frame()
+        if merge and not len(rows) and os.path.exists(filepath):
+            # Nada novo: o arquivo existente fica intacto, sem ser reescrito
+            print(f"  -> {repo_name_full}: nenhum PR novo; arquivo mantido.")
+            saved = (state.get(repo_name_full) or {}).get('saved') or 0
+            state.finish(repo_name_full, saved)
+            return saved
+        if merge:
+            existing = get_storage().read_repo(filepath)
+            print(f"  -> {repo_name_full}: {len(rows)} PRs novos somados aos {len(existing)} existentes.")
+            rows = to_typed_frame(pd.concat([existing, rows], ignore_index=True))
+        saved = save_repo_rows(rows, filepath, repo_name_full)
+        state.finish(repo_name_full, saved)
+    return saved
+
+def page_sizer(state, repo_name_full):
+    """AdaptivePageSize do repositório, começando do último tamanho que funcionou para ele.
+    Com o cache HTTP gravando ou reproduzindo, o tamanho fica fixo em PR_PAGE_SIZE para as
+    queries (e as chaves do cache) serem as mesmas nas duas execuções."""
+    if get_http_cache().mode in ('record', 'replay'):
+        return AdaptivePageSize(adaptive=False)
+    return AdaptivePageSize(state.page_size(repo_name_full))
+
+@profiled(lambda repo, *args, **kwargs: f"{repo['owner']['login']}-{repo['name']}")
+def process_and_save_repo(repo, output_dir, incremental=False):
+    """Processa um único repositório, retomando do último checkpoint e pulando os já concluídos.
+    No modo incremental, os concluídos recebem apenas os PRs atualizados desde a última coleta."""
+    state = get_crawl_state()
+    repo_name_full = None
     try:
         owner = repo['owner']['login']
         name = repo['name']
         repo_name_full = f"{owner}/{name}"
 
-        filename = f"{owner}-{name}.csv"
-        filepath = os.path.join(output_dir, filename)
+        filepath = repo_output_path(output_dir, owner, name)
 
-        if os.path.exists(filepath):
-            print(f"JÁ EXISTE: Pulando {repo_name_full}, o arquivo '{filename}' já foi criado.")
+        resume = start_repo(state, repo_name_full, filepath, incremental)
+        if resume is None:
             return 0
+        after_cursor, fetched, updated_after, valid = resume
 
-        print(f"Iniciando: {repo_name_full}")
-        
-        # A chamada aqui permanece a mesma, pois a função agora tem o limite embutido
-        prs = get_prs_for_repo(owner, name)
-        
-        valid_prs_for_repo = []
-        for pr in prs:
-            if not pr or pr.get('reviews') is None: continue
-            if pr['reviews']['totalCount'] < 1: continue
-            
-            created_at = datetime.fromisoformat(pr['createdAt'].replace('Z', '+00:00'))
-            final_date_str = pr['mergedAt'] or pr['closedAt']
-            if not final_date_str: continue
-            
-            duration_hours = (datetime.fromisoformat(final_date_str.replace('Z', '+00:00')) - created_at).total_seconds() / 3600
-            if duration_hours <= 1: continue
-
-            valid_prs_for_repo.append({
-                'repository': repo_name_full, 'status': pr['state'], 'analysis_time_hours': duration_hours,
-                'size_files': pr['changedFiles'], 'size_additions': pr['additions'], 'size_deletions': pr['deletions'],
-                'description_chars': len(pr.get('bodyText') or ''), 'interaction_participants': pr['participants']['totalCount'],
-                'interaction_comments': pr['comments']['totalCount'], 'reviews_count': pr['reviews']['totalCount']
-            })
-
-        if valid_prs_for_repo:
-            df = pd.DataFrame(valid_prs_for_repo)
-            df.to_csv(filepath, index=False)
-            print(f"SALVO: {repo_name_full} -> {len(valid_prs_for_repo)} PRs em '{filepath}'")
-            return len(valid_prs_for_repo)
-        else:
-            pd.DataFrame([]).to_csv(filepath)
-            print(f"Finalizado: {repo_name_full} -> Nenhum PR válido. Arquivo vazio criado.")
-            return 0
+        pager = page_sizer(state, repo_name_full)
+        try:
+            get_prs_for_repo(owner, name, max_prs=INCREMENTAL_MAX_PRS if updated_after else 200,
+                             after_cursor=after_cursor, fetched=fetched, valid=valid,
+                             on_page=make_checkpoint(state, repo_name_full), updated_after=updated_after,
+                             pager=pager)
+        finally:
+            state.set_page_size(repo_name_full, pager.size)
+        return finish_repo(state, repo_name_full, filepath, merge=bool(updated_after))
             
     except Exception as e:
         print(f"ERRO ao processar {repo.get('name')}: {e}")
+        if repo_name_full:
+            state.fail(repo_name_full, e)
         return 0
 
-def combine_csvs(input_dir, output_file):
+def _read_repo_csv(file):
+    """Lê e valida um CSV individual (executado em paralelo pelo combine_csvs).
+
+    Retorna (nome, linhas já serializadas sem cabeçalho, total de linhas, motivo do descarte).
+    """
+    name = os.path.basename(file)
+    try:
+        with open(file, newline='', encoding='utf-8') as f:
+            header = next(csv.reader(f), None)
+        if not header or header == ['']:
+            return name, None, 0, "arquivo vazio"
+        if header != COLUMNS:
+            return name, None, 0, f"cabeçalho inesperado {header}"
+        df = pd.read_csv(file, dtype={c: SCHEMA[c] for c in COLUMNS})
+    except (OSError, UnicodeDecodeError, ValueError, pd.errors.ParserError) as e:
+        return name, None, 0, f"malformado ({e})"
+    if df.empty:
+        return name, None, 0, "arquivo vazio"
+    return name, df.to_csv(index=False, header=False), len(df), None
+
+def combine_csvs(input_dir, output_file, jobs=None):
+    """Junta os CSVs individuais em streaming: os arquivos são lidos e validados em paralelo
+    e cada um é escrito no arquivo final assim que fica pronto, então a memória usada não
+    depende do tamanho do dataset (no máximo 2 arquivos por processo ficam em trânsito)."""
     print(f"\nCombinando arquivos CSV do diretório '{input_dir}'...")
-    all_files = glob.glob(os.path.join(input_dir, "*.csv"))
+    all_files = sorted(glob.glob(os.path.join(input_dir, "*.csv")))
     if not all_files:
         print("Nenhum arquivo CSV para combinar.")
         return
 
-    df_list = []
-    for file in all_files:
-        try:
-            # Tenta ler o arquivo
-            df = pd.read_csv(file)
-            # Adiciona na lista apenas se não estiver vazio
-            if not df.empty:
-                df_list.append(df)
-        except pd.errors.EmptyDataError:
-            # Se o arquivo estiver vazio, informa e continua
-            print(f"AVISO: Pulando arquivo vazio: {os.path.basename(file)}")
-            continue
+    jobs = jobs or cpu_count()
+    total_rows = 0
+    combined_files = 0
+    skipped = []
+    tmp_path = output_file + '.tmp'
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as out, ProcessPoolExecutor(max_workers=jobs) as executor:
+        out.write(','.join(COLUMNS) + '\n')
+        files = iter(all_files)
+        in_flight = deque(executor.submit(_read_repo_csv, f) for f in islice(files, 2 * jobs))
+        while in_flight:
+            name, body, rows, reason = in_flight.popleft().result()
+            next_file = next(files, None)
+            if next_file is not None:
+                in_flight.append(executor.submit(_read_repo_csv, next_file))
+            if reason:
+                skipped.append((name, reason))
+                continue
+            out.write(body)
+            total_rows += rows
+            combined_files += 1
 
-    if not df_list:
+    if not total_rows:
+        os.remove(tmp_path)
         print("Nenhum dado válido encontrado nos arquivos CSV para combinar.")
-        return
+    else:
+        os.replace(tmp_path, output_file)
+        print(f"Total de {total_rows} registros de {combined_files} arquivos salvos no arquivo final '{output_file}'")
+
+    empty = [name for name, reason in skipped if reason == "arquivo vazio"]
+    if empty:
+        print(f"AVISO: {len(empty)} arquivos vazios pulados.")
+    for name, reason in skipped:
+        if reason != "arquivo vazio":
+            print(f"AVISO: Pulando {name}: {reason}")
 
-    combined_df = pd.concat(df_list, ignore_index=True)
-    combined_df.to_csv(output_file, index=False)
-    print(f"Total de {len(combined_df)} registros salvos no arquivo final '{output_file}'")
-def main():
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    top_repos_list = get_top_repos(total_to_fetch=200)
+def repo_full_name(repo):
+    return f"{repo['owner']['login']}/{repo['name']}"
+
+def repo_failed(repo):
+    """Critério de nova tentativa dos escalonadores: a coleta terminou com falha registrada
+    e o repositório ainda não esgotou as tentativas do estado da coleta."""
+    return get_crawl_state().retryable(repo_full_name(repo))
+
+def report_progress(repo, count, done, total):
+    print(f"[{done}/{total}] {repo_full_name(repo)}: {count} PRs salvos.")
+
+def _init_pool_worker():
+    """Zera os contadores herdados do processo principal."""
+    TOKEN_POOL.reset_stats()
+    METRICS.reset()
+
+def _pool_worker(repo, output_dir, incremental=False):
+    """Tarefa do motor pool: devolve também o uso de tokens e as métricas acumulados neste processo."""
+    return (process_and_save_repo(repo, output_dir, incremental), os.getpid(), TOKEN_POOL.usage(),
+            METRICS.snapshot())
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Coleta PRs dos repositórios mais populares do GitHub.")
+    parser.add_argument('--engine', choices=['async', 'pool'], default='async',
+                        help="Motor de coleta: asyncio com conexões reaproveitadas (padrão) ou Pool de processos.")
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help="Máximo de queries simultâneas no motor async (padrão: 8 por token).")
+    parser.add_argument('--batch-size', type=int, default=0,
+                        help="Máximo de repositórios por query em lote no motor async (0 desativa).")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Atualiza os repositórios já coletados só com os PRs novos desde a última execução.")
+    parser.add_argument('--storage', choices=['csv', 'parquet'], default=None,
+                        help="Formato dos arquivos por repositório e do dataset combinado (padrão: csv ou $STORAGE_FORMAT).")
+    parser.add_argument('--pr-source', choices=PR_SOURCES, default=None,
+                        help="Fonte das páginas de PRs: conexão pullRequests ou API de busca com os filtros "
+                             "no servidor (padrão: pulls ou $PR_SOURCE).")
+    parser.add_argument('--processes', type=int, default=3,
+                        help="Número de processos no motor pool.")
+    parser.add_argument('--repos', type=int, default=200,
+                        help="Quantos dos repositórios mais populares considerar (padrão: 200).")
+    parser.add_argument('--min-prs', type=int, default=100,
+                        help="Mínimo de PRs fechados/mergeados para um repositório ser coletado.")
+    parser.add_argument('--top-qualifying', type=int, default=None,
+                        help="Seleciona os N primeiros repositórios que atendem ao --min-prs (em vez de filtrar os --repos mais populares).")
+    parser.add_argument('--order-by', choices=list(ORDER_BY), default='stars',
+                        help="Critério de ordenação dos repositórios selecionados no índice.")
+    parser.add_argument('--refresh-index', action='store_true',
+                        help="Refaz as buscas de repositórios mesmo com o índice local ainda válido.")
+    parser.add_argument('--http-cache', choices=CACHE_MODES, default=None,
+                        help="Cache em disco das respostas da API: use, record, replay (offline) ou off "
+                             "(padrão: variável HTTP_CACHE ou off).")
+    parser.add_argument('--metrics', default=None,
+                        help="Exporta as métricas da coleta: texto do Prometheus se terminar em .prom, senão JSON lines.")
+    parser.add_argument('--profile', choices=PROFILERS, default=None,
+                        help="Profiling de cada repositório (motor pool) ou da coleta inteira (async), "
+                             "gravado em COLLECTOR_PROFILE_DIR (padrão: profiles/).")
+    args = parser.parse_args(argv)
+    if args.engine == 'pool' and 'fork' not in get_all_start_methods():
+        # Os processos do motor pool herdam a configuração (cache, armazenamento, tokens) pelo fork
+        parser.error("o motor 'pool' precisa de fork, indisponível nesta plataforma; use --engine async.")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.storage:
+        configure_storage(args.storage)
+    if args.pr_source:
+        configure_query_planner(args.pr_source)
+    if args.http_cache:
+        configure_http_cache(args.http_cache)
+    if args.profile:
+        configure_profiler(args.profile)
+    storage = get_storage()
+    output_dir = storage.default_output_dir
+    os.makedirs(output_dir, exist_ok=True)
+    top_repos_list = get_top_repos(total_to_fetch=args.repos, min_prs=args.min_prs,
+                                   top_qualifying=args.top_qualifying, order_by=args.order_by,
+                                   refresh=args.refresh_index)
     if not top_repos_list:
         print("Nenhum repositório encontrado para processar.")
         return
     
-    num_processes = 3
-    print(f"\nIniciando coleta paralela com {num_processes} processos...")
-    worker_func = partial(process_and_save_repo, output_dir=OUTPUT_DIR)
-    
-    with Pool(processes=num_processes) as pool:
-        results = pool.map(worker_func, top_repos_list)
+    if args.engine == 'async':
+        from async_collector import run_async_collection
+        concurrency = args.concurrency or 8 * max(1, len(TOKEN_POOL))
+        print(f"\nIniciando coleta assíncrona com {len(TOKEN_POOL)} token(s) e até {concurrency} queries simultâneas...")
+        # No motor assíncrono os repositórios se intercalam: o profiling cobre a coleta inteira
+        results = profile_call('coleta_async', run_async_collection, top_repos_list, output_dir,
+                               concurrency=concurrency, max_batch_size=args.batch_size,
+                               incremental=args.incremental)
+        usage = TOKEN_POOL.usage()
+    else:
+        num_processes = args.processes
+        print(f"\nIniciando coleta paralela com {num_processes} processos...")
+        worker_func = partial(_pool_worker, output_dir=output_dir, incremental=args.incremental)
+
+        # Os repositórios maiores primeiro, um por vez para o processo que ficar livre
+        outputs = imap_by_cost(worker_func, top_repos_list, num_processes,
+                               should_retry=lambda repo, _: repo_failed(repo),
+                               initializer=_init_pool_worker)
+        results = []
+        usage_by_pid = {}
+        for repo, output, error in outputs:
+            if error is not None:
+                get_crawl_state().fail(repo_full_name(repo), error)
+                output = (0, None, {}, None)
+            count, pid, usage, metrics = output
+            results.append(count)
+            # O uso e as métricas de cada processo são cumulativos: fica o último retorno de cada pid
+            if pid is not None:
+                usage_by_pid[pid] = (usage, metrics)
+            report_progress(repo, count, len(results), len(top_repos_list))
+        usage = merge_usage([TOKEN_POOL.usage(), *(u for u, _ in usage_by_pid.values())])
+        for _, metrics in usage_by_pid.values():
+            METRICS.merge(metrics)
         
     total_prs_saved = sum(results)
     print(f"\nColeta incremental finalizada! Total de {total_prs_saved} PRs salvos em arquivos individuais.")
+    print_usage_report(usage)
+    print_metrics_report(METRICS)
+    if args.metrics:
+        METRICS.export(args.metrics)
+        print(f"Métricas exportadas para '{args.metrics}'.")
+    if get_http_cache().enabled:
+        scope = " (processo principal)" if args.engine == 'pool' else ""
+        print(f"Uso do {get_http_cache().summary()}{scope}.")
+    state = get_crawl_state()
+    print(f"Estado da coleta por status: {state.summary()}")
+    crawled = [repo_full_name(r) for r in top_repos_list]
+    get_repo_index().mark_crawled([n for n in crawled if (state.get(n) or {}).get('status') == 'done'])
     
-    combine_csvs(input_dir=OUTPUT_DIR, output_file="dataset_completo.csv")
+    if storage.name == 'parquet':
+        storage.combine(input_dir=output_dir, output_file="dataset_completo.parquet")
+    else:
+        combine_csvs(input_dir=output_dir, output_file="dataset_completo.csv")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,274 @@
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+
+# --- CONFIGURAÇÕES ---
+PREFIX = "collector_"
+# Limites superiores dos buckets dos histogramas (segundos, exceto onde indicado)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+DEPTH_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+PAGE_SIZE_BUCKETS = (10, 20, 40, 60, 80, 100)
+_BUCKETS = {'scheduler_queue_depth': DEPTH_BUCKETS, 'pr_page_size': PAGE_SIZE_BUCKETS}
+# Fases do tempo de cada repositório
+PHASES = ('fetch', 'parse', 'write')
+PROFILERS = ('cprofile', 'pyinstrument')
+PROFILE_DIR = os.getenv("COLLECTOR_PROFILE_DIR", "profiles")
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Metrics:
+    """Métricas da coleta em memória: contadores, valores instantâneos (gauges) e
+    histogramas com buckets fixos, todos identificados por nome + rótulos.
+
+    Cada processo do motor pool tem a sua instância; snapshot() devolve uma cópia
+    serializável que o processo principal soma com merge().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zera as métricas (usado nos processos filhos, que herdam as do pai)."""
+        with self._lock:
+            self.counters = {}
+            self.gauges = {}
+            self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges[_key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                buckets = _BUCKETS.get(name, LATENCY_BUCKETS)
+                histogram = self.histograms[key] = {'buckets': buckets, 'counts': [0] * (len(buckets) + 1),
+                                                    'sum': 0.0, 'count': 0, 'min': value, 'max': value}
+            histogram['counts'][bisect.bisect_left(histogram['buckets'], value)] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+            histogram['min'] = min(histogram['min'], value)
+            histogram['max'] = max(histogram['max'], value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Soma o tempo do bloco no contador `name` (em segundos)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.inc(name, time.perf_counter() - started, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'histograms': {k: {**h, 'counts': list(h['counts'])} for k, h in self.histograms.items()},
+            }
+
+    def merge(self, snapshot):
+        with self._lock:
+            for key, value in snapshot['counters'].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            self.gauges.update(snapshot['gauges'])
+            for key, other in snapshot['histograms'].items():
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    self.histograms[key] = {**other, 'counts': list(other['counts'])}
+                    continue
+                histogram['counts'] = [a + b for a, b in zip(histogram['counts'], other['counts'])]
+                histogram['sum'] += other['sum']
+                histogram['count'] += other['count']
+                histogram['min'] = min(histogram['min'], other['min'])
+                histogram['max'] = max(histogram['max'], other['max'])
+        return self
+
+    # --- CONSULTAS ---
+
+    def total(self, name, **match):
+        """Soma de um contador em todas as séries cujos rótulos incluem `match`."""
+        match = {k: str(v) for k, v in match.items()}
+        return sum(value for (n, labels), value in self.counters.items()
+                   if n == name and match.items() <= dict(labels).items())
+
+    def by_label(self, name, label):
+        totals = {}
+        for (n, labels), value in self.counters.items():
+            if n == name:
+                key = dict(labels).get(label)
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def quantile(self, name, q):
+        """Quantil aproximado (interpolado dentro do bucket) de todas as séries de um histograma,
+        limitado ao menor e ao maior valor observados."""
+        series = [h for (n, _), h in self.histograms.items() if n == name]
+        if not series:
+            return None
+        buckets = series[0]['buckets']
+        counts = [sum(c) for c in zip(*(h['counts'] for h in series))]
+        low = min(h['min'] for h in series)
+        high = max(h['max'] for h in series)
+        target = q * sum(counts)
+        seen = 0
+        for i, count in enumerate(counts):
+            if count and seen + count >= target:
+                lower = buckets[i - 1] if i > 0 else low
+                upper = buckets[i] if i < len(buckets) else high
+                return min(high, max(low, lower + (upper - lower) * (target - seen) / count))
+            seen += count
+        return high
+
+    # --- EXPORTAÇÃO ---
+
+    def write_jsonl(self, path):
+        """Uma linha JSON por série, precedida de uma linha com o horário da exportação."""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'type': 'run', 'exported_at': datetime.now(timezone.utc).isoformat(timespec='seconds')}) + '\n')
+            for kind, series in (('counter', self.counters), ('gauge', self.gauges)):
+                for (name, labels), value in sorted(series.items()):
+                    f.write(json.dumps({'type': kind, 'name': PREFIX + name, 'labels': dict(labels), 'value': value}) + '\n')
+            for (name, labels), h in sorted(self.histograms.items()):
+                buckets = {str(b): c for b, c in zip(list(h['buckets']) + ['+Inf'], h['counts'])}
+                f.write(json.dumps({'type': 'histogram', 'name': PREFIX + name, 'labels': dict(labels),
+                                    'buckets': buckets, 'sum': h['sum'], 'count': h['count'],
+                                    'min': h['min'], 'max': h['max']}) + '\n')
+
+    def write_prometheus(self, path):
+        """Formato texto do Prometheus (node_exporter textfile collector)."""
+        lines = []
+        for kind, series in (('counter', self.counters), ('gauge', self.gauges)):
+            for name in sorted({n for n, _ in series}):
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+                lines += [f"{PREFIX}{name}{_prometheus_labels(labels)} {value}"
+                          for (n, labels), value in sorted(series.items()) if n == name]
+        for name in sorted({n for n, _ in self.histograms}):
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+            for (n, labels), h in sorted(self.histograms.items()):
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(h['buckets']) + ['+Inf'], h['counts']):
+                    cumulative += count
+                    lines.append(f"{PREFIX}{name}_bucket{_prometheus_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{PREFIX}{name}_sum{_prometheus_labels(labels)} {h['sum']}")
+                lines.append(f"{PREFIX}{name}_count{_prometheus_labels(labels)} {h['count']}")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, path)
+
+    def export(self, path):
+        """Grava em texto do Prometheus se `path` terminar em .prom, senão em JSON lines."""
+        if path.endswith('.prom'):
+            self.write_prometheus(path)
+        else:
+            self.write_jsonl(path)
+
+
+def _prometheus_labels(labels):
+    if not labels:
+        return ""
+    escape = lambda v: re.sub(r'(["\\])', r'\\\1', v).replace('\n', '\\n')
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels) + "}"
+
+
+def print_metrics_report(metrics, top=5):
+    """Resumo no fim da coleta: latência, novas tentativas, custo, bytes, uso dos workers e
+    os repositórios mais demorados por fase."""
+    requests = sum(h['count'] for (n, _), h in metrics.histograms.items() if n == 'graphql_request_seconds')
+    print("\n### Métricas da coleta ###")
+    if requests:
+        p50, p95 = metrics.quantile('graphql_request_seconds', 0.5), metrics.quantile('graphql_request_seconds', 0.95)
+        print(f"Requisições: {requests} (p50={p50:.2f}s, p95={p95:.2f}s), "
+              f"{metrics.total('graphql_response_bytes_total') / 2**20:.1f} MiB recebidos, "
+              f"{metrics.total('graphql_cost_points_total'):.0f} pontos de custo")
+    retries = {cause: count for cause, count in metrics.by_label('retries_total', 'cause').items() if count}
+    if retries:
+        print("Novas tentativas por causa: " + ", ".join(f"{cause}={count:.0f}" for cause, count in sorted(retries.items())))
+    workers = metrics.gauges.get(_key('scheduler_workers', {}))
+    wall = metrics.total('scheduler_wall_seconds_total')
+    if workers and wall:
+        busy = metrics.total('scheduler_busy_seconds_total')
+        print(f"Workers: {workers}, utilização {busy / (workers * wall):.0%}, "
+              f"fila p95={metrics.quantile('scheduler_queue_depth', 0.95):.0f}")
+    phases = metrics.by_label('repo_phase_seconds_total', 'phase')
+    if phases:
+        print("Tempo por fase: " + ", ".join(f"{phase}={phases.get(phase, 0):.1f}s" for phase in PHASES))
+        by_repo = metrics.by_label('repo_phase_seconds_total', 'repo')
+        for repo, seconds in sorted(by_repo.items(), key=lambda item: -item[1])[:top]:
+            split = "/".join(f"{metrics.total('repo_phase_seconds_total', repo=repo, phase=p):.1f}" for p in PHASES)
+            print(f"  {repo}: {seconds:.1f}s (fetch/parse/write {split})")
+
+
+# Métricas do processo: todas as funções de coleta registram nele
+METRICS = Metrics()
+
+
+# --- PROFILING ---
+_PROFILER = os.getenv("COLLECTOR_PROFILE") or None
+
+def configure_profiler(profiler):
+    """Ativa o profiling (cprofile ou pyinstrument) em profile_call/profiled."""
+    global _PROFILER
+    if profiler not in PROFILERS:
+        raise ValueError(f"Profiler desconhecido: {profiler}")
+    if profiler == 'pyinstrument':
+        try:
+            import pyinstrument  # noqa: F401
+        except ImportError as e:
+            raise ImportError("O profiler 'pyinstrument' precisa do pacote 'pyinstrument' (pip install pyinstrument).") from e
+    _PROFILER = profiler
+
+
+def profile_call(label, func, *args, **kwargs):
+    """Executa `func` sob o profiler configurado (se houver) e grava o resultado em
+    PROFILE_DIR/<label>.prof (cProfile, para pstats/snakeviz) ou .html (pyinstrument)."""
+    if _PROFILER is None:
+        return func(*args, **kwargs)
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, re.sub(r'[^\w.-]', '-', label))
+    if _PROFILER == 'pyinstrument':
+        from pyinstrument import Profiler
+        profiler = Profiler(async_mode='enabled')
+        profiler.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.stop()
+            with open(f"{path}.html", 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(f"{path}.prof")
+
+
+def profiled(label):
+    """Decorador de profile_call; `label(*args, **kwargs)` dá o nome do arquivo."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return profile_call(label(*args, **kwargs), func, *args, **kwargs)
+        return wrapper
+    return decorator
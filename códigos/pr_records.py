@@ -0,0 +1,130 @@
+import sys
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from storage import COLUMNS, to_typed_frame
+
+# Campos numéricos das linhas e o tipo do array usado para cada um
+_NUMERIC_FIELDS = {
+    'analysis_time_hours': 'd',
+    'size_files': 'i',
+    'size_additions': 'i',
+    'size_deletions': 'i',
+    'description_chars': 'i',
+    'interaction_participants': 'i',
+    'interaction_comments': 'i',
+    'reviews_count': 'i',
+}
+
+
+def _hours_between(start, end):
+    """Diferença em horas entre duas listas de datas ISO 8601 da API ('...Z'), em lote."""
+    # Os 19 primeiros caracteres são 'AAAA-MM-DDTHH:MM:SS'; o 'Z' (UTC) é descartado
+    start = np.array(start, dtype='U19').astype('datetime64[s]')
+    end = np.array(end, dtype='U19').astype('datetime64[s]')
+    return (end - start).astype(np.float64) / 3600
+
+
+class PrRecords:
+    """Linhas válidas de PRs de um repositório em colunas tipadas (array), em vez de uma
+    lista de dicts: o repositório é guardado uma vez, o status vira um código de 1 byte
+    e do corpo do PR só fica o tamanho."""
+
+    __slots__ = ('repository', 'statuses', 'status_codes') + tuple(_NUMERIC_FIELDS)
+
+    def __init__(self, repository):
+        self.repository = sys.intern(repository)
+        self.statuses = []
+        self.status_codes = array('b')
+        for field, typecode in _NUMERIC_FIELDS.items():
+            setattr(self, field, array(typecode))
+
+    def __len__(self):
+        return len(self.status_codes)
+
+    def _status_code(self, status):
+        if status not in self.statuses:
+            self.statuses.append(sys.intern(status))
+        return self.statuses.index(status)
+
+    def add_nodes(self, prs, numbers=None):
+        """Converte os nós de PR de uma página da API, descartando os PRs inválidos
+        (sem revisão, sem data final ou analisados em até 1 hora). Se `numbers` for uma
+        lista, recebe o número de cada PR que virou linha, na mesma ordem."""
+        kept, created, final = [], [], []
+        for pr in prs:
+            if not pr or pr.get('reviews') is None or pr['reviews']['totalCount'] < 1:
+                continue
+            final_date = pr.get('mergedAt') or pr['closedAt']
+            if not final_date:
+                continue
+            kept.append(pr)
+            created.append(pr['createdAt'])
+            final.append(final_date)
+        if not kept:
+            return self
+
+        hours = _hours_between(created, final)
+        for pr, duration in zip(kept, hours.tolist()):
+            if duration <= 1:
+                continue
+            self.status_codes.append(self._status_code(pr['state']))
+            self.analysis_time_hours.append(duration)
+            self.size_files.append(pr['changedFiles'])
+            self.size_additions.append(pr['additions'])
+            self.size_deletions.append(pr['deletions'])
+            self.description_chars.append(len(pr.get('bodyText') or ''))
+            self.interaction_participants.append(pr['participants']['totalCount'])
+            self.interaction_comments.append(pr['comments']['totalCount'])
+            self.reviews_count.append(pr['reviews']['totalCount'])
+            if numbers is not None:
+                numbers.append(pr['number'])
+        return self
+
+    def truncate(self, size):
+        """Mantém só as primeiras `size` linhas."""
+        for field in ('status_codes',) + tuple(_NUMERIC_FIELDS):
+            del getattr(self, field)[size:]
+        return self
+
+    def extend(self, other):
+        codes = [self._status_code(status) for status in other.statuses]
+        self.status_codes.extend(codes[code] for code in other.status_codes)
+        for field in _NUMERIC_FIELDS:
+            getattr(self, field).extend(getattr(other, field))
+        return self
+
+    def to_json(self):
+        """Forma colunar gravada nas páginas do estado da coleta."""
+        columns = {field: getattr(self, field).tolist() for field in _NUMERIC_FIELDS}
+        return {'statuses': self.statuses, 'status': self.status_codes.tolist(), **columns}
+
+    @classmethod
+    def from_json(cls, repository, data):
+        """Inverso de to_json; aceita também a lista de dicts das páginas gravadas por
+        versões anteriores."""
+        records = cls(repository)
+        if isinstance(data, list):
+            for row in data:
+                records.status_codes.append(records._status_code(row['status']))
+                for field in _NUMERIC_FIELDS:
+                    getattr(records, field).append(row[field])
+            return records
+        records.statuses = [sys.intern(status) for status in data['statuses']]
+        records.status_codes.extend(data['status'])
+        for field in _NUMERIC_FIELDS:
+            getattr(records, field).extend(data[field])
+        return records
+
+    def to_frame(self):
+        """DataFrame com as colunas e os tipos do esquema do dataset."""
+        codes = np.asarray(self.status_codes, dtype=np.intp)
+        data = {
+            'repository': pd.Categorical.from_codes(np.zeros(len(self), dtype=np.int8), [self.repository]),
+            'status': np.asarray(self.statuses + [None], dtype=object)[codes],
+        }
+        for field in _NUMERIC_FIELDS:
+            data[field] = np.asarray(getattr(self, field))
+        return to_typed_frame(pd.DataFrame(data, columns=COLUMNS))
@@ -0,0 +1,143 @@
+import os
+
+# --- PLANEJAMENTO DAS QUERIES DE PRs ---
+# Duas fontes para as páginas de PRs de um repositório:
+#   pulls  - conexão `pullRequests` do repositório; os filtros (revisões, duração) são
+#            aplicados no cliente.
+#   search - API de busca (`type: ISSUE`) com os qualificadores abaixo, que já descartam
+#            no servidor os PRs abertos e os sem revisão. A busca devolve no máximo 1000
+#            resultados por consulta, então serve para o limite de PRs por repositório,
+#            não para varrer repositórios inteiros.
+PR_SOURCES = ('pulls', 'search')
+SEARCH_QUALIFIERS = "is:pr is:closed -review:none"
+
+# Tamanho das páginas de PRs: começa em PR_PAGE_SIZE (ou no último que funcionou para o
+# repositório, guardado em crawl_state) e se ajusta entre MIN_PAGE_SIZE e o máximo da API
+PR_PAGE_SIZE = 40
+MIN_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+PAGE_SIZE_STEP = 10
+# Página mais lenta que isto (segundos) faz o tamanho cair; abaixo da metade, ele cresce
+PAGE_TARGET_LATENCY = float(os.getenv("PAGE_TARGET_LATENCY", "8"))
+# Tentativas de cada página antes de reduzir o tamanho, e falhas seguidas aceitas
+PAGE_MAX_ATTEMPTS = 2
+MAX_PAGE_FAILURES = 6
+# Teto de PRs lidos por repositório, em múltiplos do limite de PRs válidos
+RAW_PRS_FACTOR = 5
+
+# Campos de cada PR, compartilhados por todas as queries de PRs. Só o necessário para as
+# linhas do CSV: `mergedAt` não é pedido porque num PR mergeado `closedAt` é a data do merge.
+PR_FIELDS_FRAGMENT = """
+fragment PrFields on PullRequest {
+  number, updatedAt
+  state, createdAt, closedAt, additions, deletions, changedFiles, bodyText
+  participants(first: 1) { totalCount }
+  comments(first: 1) { totalCount }
+  reviews(first: 1) { totalCount }
+}
+"""
+_PULL_REQUESTS_QUERY_TEMPLATE = """
+query %(operation)s($owner: String!, $name: String!, $afterCursor: String, $pageSize: Int!) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(first: $pageSize, after: $afterCursor, states: [MERGED, CLOSED], orderBy: {field: %(order)s, direction: DESC}) {
+      nodes { ...PrFields }
+      pageInfo { endCursor, hasNextPage }
+    }
+  }
+  rateLimit { cost remaining resetAt limit }
+}
+"""
+GET_PULL_REQUESTS_QUERY = _PULL_REQUESTS_QUERY_TEMPLATE % {
+    'operation': 'GetPullRequests', 'order': 'CREATED_AT'} + PR_FIELDS_FRAGMENT
+# Modo incremental: os atualizados mais recentemente primeiro, para parar no high water
+GET_UPDATED_PULL_REQUESTS_QUERY = _PULL_REQUESTS_QUERY_TEMPLATE % {
+    'operation': 'GetUpdatedPullRequests', 'order': 'UPDATED_AT'} + PR_FIELDS_FRAGMENT
+SEARCH_PULL_REQUESTS_QUERY = """
+query SearchPullRequests($searchQuery: String!, $afterCursor: String, $pageSize: Int!) {
+  search(query: $searchQuery, type: ISSUE, first: $pageSize, after: $afterCursor) {
+    nodes { ...PrFields }
+    pageInfo { endCursor, hasNextPage }
+  }
+  rateLimit { cost remaining resetAt limit }
+}
+""" + PR_FIELDS_FRAGMENT
+
+_DEFAULT_SOURCE = os.getenv("PR_SOURCE", "pulls")
+
+def configure(source):
+    """Define a fonte das páginas de PRs (chamado por main() antes de iniciar os workers)."""
+    global _DEFAULT_SOURCE
+    if source not in PR_SOURCES:
+        raise ValueError(f"Fonte de PRs desconhecida: {source}")
+    _DEFAULT_SOURCE = source
+
+def get_source():
+    return _DEFAULT_SOURCE
+
+def search_query(owner, name, updated_after=None):
+    """Texto da busca de PRs de um repositório. No modo incremental o filtro do high water
+    também vai para o servidor (`closed:>`)."""
+    if updated_after:
+        return f"repo:{owner}/{name} {SEARCH_QUALIFIERS} closed:>{updated_after} sort:updated-desc"
+    return f"repo:{owner}/{name} {SEARCH_QUALIFIERS} sort:created-desc"
+
+def plan_pr_page(owner, name, after_cursor=None, updated_after=None, source=None, page_size=PR_PAGE_SIZE):
+    """Query e variáveis da próxima página (de `page_size` PRs) de um repositório."""
+    if (source or get_source()) == 'search':
+        return SEARCH_PULL_REQUESTS_QUERY, {
+            "searchQuery": search_query(owner, name, updated_after), "afterCursor": after_cursor,
+            "pageSize": page_size}
+    query = GET_UPDATED_PULL_REQUESTS_QUERY if updated_after else GET_PULL_REQUESTS_QUERY
+    return query, {"owner": owner, "name": name, "afterCursor": after_cursor, "pageSize": page_size}
+
+class PageTimeoutError(Exception):
+    """A API respondeu, mas a query passou do tempo no servidor (erro de timeout, sem dados)."""
+
+def extract_pr_page(result):
+    """Retorna a página de PRs (`nodes` e `pageInfo`) da resposta de qualquer uma das fontes,
+    ou levanta exceção se o repositório não veio (assim a falha é registrada no estado da
+    coleta em vez de virar um CSV vazio)."""
+    data = (result or {}).get('data') or {}
+    if data.get('search') is not None:
+        return data['search']
+    repo_data = data.get('repository')
+    if not repo_data or 'pullRequests' not in repo_data:
+        errors = (result or {}).get('errors')
+        if any('timeout' in (e.get('message') or '').lower() for e in errors or []):
+            raise PageTimeoutError(errors[0]['message'])
+        raise Exception(f"Repositório sem dados na resposta: {errors or 'resposta vazia'}")
+    return repo_data['pullRequests']
+
+def max_raw_prs(max_prs):
+    """Quantos PRs no máximo são lidos para tentar juntar `max_prs` válidos."""
+    return max_prs * RAW_PRS_FACTOR
+
+class AdaptivePageSize:
+    """Tamanho da próxima página de PRs de um repositório (aumento aditivo, redução
+    multiplicativa, como batch_queries.AdaptiveBatchSize).
+
+    Cresce PAGE_SIZE_STEP a cada resposta rápida até MAX_PAGE_SIZE e cai pela metade em
+    respostas lentas e em páginas que falharam (timeout, 5xx), que são pedidas de novo
+    menores em vez de repetir a mesma página grande. Com `adaptive=False` fica fixo.
+    """
+
+    def __init__(self, initial=None, adaptive=True):
+        self.size = min(MAX_PAGE_SIZE, max(MIN_PAGE_SIZE, initial or PR_PAGE_SIZE))
+        self.adaptive = adaptive
+        self.failures = 0
+
+    def success(self, size, elapsed):
+        self.failures = 0
+        if not self.adaptive:
+            return
+        if elapsed > PAGE_TARGET_LATENCY:
+            self.size = max(MIN_PAGE_SIZE, min(self.size, size) // 2)
+        elif elapsed < PAGE_TARGET_LATENCY / 2 and size >= self.size:
+            self.size = min(MAX_PAGE_SIZE, self.size + PAGE_SIZE_STEP)
+
+    def failure(self, size):
+        """Registra uma página que falhou; retorna False depois de MAX_PAGE_FAILURES falhas seguidas."""
+        self.failures += 1
+        if self.adaptive:
+            self.size = max(MIN_PAGE_SIZE, min(self.size, size) // 2)
+        return self.failures <= MAX_PAGE_FAILURES
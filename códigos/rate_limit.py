@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+# --- CONFIGURAÇÕES ---
+# Pontos que nunca gastamos, para sobrar margem para outras ferramentas do mesmo token
+DEFAULT_RESERVE = 50
+# Abaixo desta fração do limite as queries passam a ser espaçadas até o reset
+DEFAULT_PACE_BELOW = 0.2
+# Espera usada quando a API acusa limite secundário sem informar Retry-After
+SECONDARY_LIMIT_WAIT = 60
+
+
+class RateLimitError(Exception):
+    """Erro de limite de taxa (primário ou secundário). Sempre pode ser repetido."""
+
+    def __init__(self, message, retry_after=None, reset_at=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reset_at = reset_at
+
+
+def _parse_reset_at(value):
+    """Converte o `resetAt` ISO 8601 da API GraphQL em timestamp Unix."""
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+def check_rate_limit(status, headers, payload):
+    """Levanta RateLimitError se a resposta indicar limite de taxa (HTTP ou GraphQL)."""
+    headers = headers or {}
+    retry_after = headers.get('Retry-After')
+    remaining = headers.get('X-RateLimit-Remaining')
+    reset = headers.get('X-RateLimit-Reset')
+
+    if status in (403, 429):
+        if retry_after is not None:
+            raise RateLimitError(f"HTTP {status} com Retry-After={retry_after}", retry_after=float(retry_after))
+        if remaining == '0' and reset is not None:
+            raise RateLimitError(f"HTTP {status}: pontos esgotados", reset_at=float(reset))
+        if status == 429:
+            raise RateLimitError(f"HTTP {status}", retry_after=SECONDARY_LIMIT_WAIT)
+        # Limite secundário sem Retry-After: só a mensagem no corpo (fora de `errors`)
+        message = str((payload or {}).get('message', ''))
+        if 'rate limit' in message.lower():
+            raise RateLimitError(f"HTTP {status}: {message}", retry_after=SECONDARY_LIMIT_WAIT)
+
+    for error in (payload or {}).get('errors') or []:
+        error_type = str(error.get('type', '')).upper()
+        message = str(error.get('message', ''))
+        if error_type == 'RATE_LIMITED' or 'rate limit' in message.lower():
+            reset_at = float(reset) if reset is not None and remaining == '0' else None
+            wait = float(retry_after) if retry_after is not None else (None if reset_at else SECONDARY_LIMIT_WAIT)
+            raise RateLimitError(f"GraphQL: {message}", retry_after=wait, reset_at=reset_at)
+
+
+class RateLimitScheduler:
+    """Controla o orçamento de pontos de um token.
+
+    Acompanha `remaining`/`resetAt` pelos cabeçalhos X-RateLimit-* e pelo campo
+    `rateLimit` das respostas, reserva o custo estimado de cada query antes do envio
+    e devolve quanto tempo o chamador deve esperar. Com orçamento folgado as queries
+    saem sem espera; abaixo de `pace_below` do limite o restante é distribuído
+    uniformemente até o reset, e sem orçamento a espera vai exatamente até o reset.
+    """
+
+    def __init__(self, reserve=DEFAULT_RESERVE, pace_below=DEFAULT_PACE_BELOW):
+        self.reserve = reserve
+        self.pace_below = pace_below
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None
+        self.paused_until = 0.0
+        self.next_slot = 0.0
+        self.costs = {}
+        self.points_used = 0
+        self._lock = threading.Lock()
+
+    def expected_cost(self, cost_key=None):
+        return self.costs.get(cost_key, 1)
+
+    def reserve_slot(self, cost_key=None):
+        """Reserva o custo estimado da próxima query e retorna a espera em segundos."""
+        cost = self.expected_cost(cost_key)
+        with self._lock:
+            now = time.time()
+            if self.reset_at is not None and now >= self.reset_at:
+                # A janela virou: o orçamento volta ao limite até a próxima resposta confirmar
+                self.remaining = self.limit
+                self.reset_at = None
+
+            start = max(now, self.paused_until, self.next_slot)
+            interval = 0.0
+            if self.remaining is not None and self.reset_at is not None:
+                available = self.remaining - self.reserve
+                if available < cost:
+                    start = max(start, self.reset_at + 1)
+                elif self.limit and self.remaining < self.limit * self.pace_below:
+                    interval = (self.reset_at - now) / (available / cost)
+                self.remaining -= cost
+            self.next_slot = start + interval
+            return start - now
+
+    def wait(self, cost_key=None):
+        delay = self.reserve_slot(cost_key)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self, cost_key=None):
+        delay = self.reserve_slot(cost_key)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def update(self, headers=None, payload=None, cost_key=None):
+        """Atualiza o orçamento com o que o servidor informou."""
+        headers = headers or {}
+        with self._lock:
+            if headers.get('X-RateLimit-Limit') is not None:
+                self.limit = int(headers['X-RateLimit-Limit'])
+            if headers.get('X-RateLimit-Remaining') is not None:
+                self.remaining = int(headers['X-RateLimit-Remaining'])
+            if headers.get('X-RateLimit-Reset') is not None:
+                self.reset_at = float(headers['X-RateLimit-Reset'])
+
+            rate_limit = ((payload or {}).get('data') or {}).get('rateLimit')
+            if rate_limit:
+                if rate_limit.get('limit') is not None:
+                    self.limit = rate_limit['limit']
+                self.remaining = rate_limit['remaining']
+                self.reset_at = _parse_reset_at(rate_limit['resetAt'])
+                cost = rate_limit.get('cost')
+                if cost is not None:
+                    self.points_used += cost
+                    self.costs[cost_key] = max(1, cost)
+
+    def pause(self, error):
+        """Suspende o envio até o momento indicado pelo erro e retorna a espera em segundos."""
+        with self._lock:
+            now = time.time()
+            if error.reset_at is not None:
+                until = error.reset_at + 1
+                self.remaining = 0
+                self.reset_at = error.reset_at
+            else:
+                until = now + (error.retry_after if error.retry_after is not None else SECONDARY_LIMIT_WAIT)
+            self.paused_until = max(self.paused_until, until)
+            return self.paused_until - now
@@ -0,0 +1,141 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+# --- CONFIGURAÇÕES ---
+REPO_INDEX_DB = os.getenv("REPO_INDEX_DB", "repo_index.sqlite")
+# Validade das buscas guardadas no índice
+REPO_INDEX_TTL_HOURS = float(os.getenv("REPO_INDEX_TTL_HOURS", "24"))
+# A busca do GitHub devolve no máximo 1000 resultados por consulta
+SEARCH_RESULT_CAP = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS repositories (
+    full_name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    name TEXT NOT NULL,
+    stars INTEGER,
+    pull_requests INTEGER NOT NULL DEFAULT 0,
+    fetched_at TEXT NOT NULL,
+    last_crawled_at TEXT
+);
+CREATE INDEX IF NOT EXISTS repositories_stars ON repositories (stars DESC);
+CREATE TABLE IF NOT EXISTS searches (
+    query TEXT PRIMARY KEY,
+    fetched_at TEXT NOT NULL,
+    results INTEGER NOT NULL,
+    min_stars INTEGER,
+    exhausted INTEGER NOT NULL
+);
+"""
+# Critérios de ordenação aceitos por select()
+ORDER_BY = {'stars': 'stars DESC', 'pull_requests': 'pull_requests DESC'}
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def shard_query(below=None, exact=None):
+    """Busca dos repositórios mais populares. A partir da segunda faixa de estrelas
+    (`stars:<N`) cada consulta continua abaixo do menor valor da anterior; `stars:N`
+    busca todos os repositórios com exatamente N estrelas (o valor da fronteira, que o
+    limite de 1000 resultados pode ter cortado ao meio)."""
+    query = "sort:stars-desc is:public"
+    if exact is not None:
+        return f"{query} stars:{exact}"
+    return f"{query} stars:<{below}" if below is not None else query
+
+
+class RepoIndex:
+    """Índice local dos repositórios encontrados pela busca do GitHub, com estrelas,
+    total de PRs fechados e quando cada um foi coletado pela última vez.
+
+    Cada consulta de busca (uma faixa de estrelas) fica registrada com a data em que
+    foi feita; dentro de REPO_INDEX_TTL_HOURS a seleção de repositórios é feita só no
+    SQLite, sem chamar a API.
+    """
+
+    def __init__(self, path=REPO_INDEX_DB, ttl_hours=REPO_INDEX_TTL_HOURS):
+        self.path = path
+        self.ttl = timedelta(hours=ttl_hours)
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def _cutoff(self):
+        return (datetime.now(timezone.utc) - self.ttl).isoformat(timespec='seconds')
+
+    def search(self, query):
+        """Registro de uma busca ainda dentro da validade, ou None."""
+        row = self._conn.execute("SELECT * FROM searches WHERE query = ? AND fetched_at >= ?",
+                                 (query, self._cutoff())).fetchone()
+        return dict(row) if row else None
+
+    def save_search(self, query, nodes, exhausted):
+        """Grava os repositórios de uma busca e o registro da busca na mesma transação."""
+        now = _now()
+        nodes = [n for n in nodes if n]
+        stars = [n.get('stargazerCount') for n in nodes if n.get('stargazerCount') is not None]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO repositories (full_name, owner, name, stars, pull_requests, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(full_name) DO UPDATE SET stars = excluded.stars, "
+                "pull_requests = excluded.pull_requests, fetched_at = excluded.fetched_at",
+                [(f"{n['owner']['login']}/{n['name']}", n['owner']['login'], n['name'], n.get('stargazerCount'),
+                  (n.get('pullRequests') or {}).get('totalCount', 0), now) for n in nodes])
+            self._conn.execute(
+                "INSERT OR REPLACE INTO searches (query, fetched_at, results, min_stars, exhausted) "
+                "VALUES (?, ?, ?, ?, ?)", (query, now, len(nodes), min(stars, default=None), int(exhausted)))
+
+    def count(self, min_stars=None):
+        """Repositórios distintos vindos de buscas ainda válidas (com ao menos `min_stars` estrelas)."""
+        sql = "SELECT COUNT(*) FROM repositories WHERE fetched_at >= ?"
+        params = [self._cutoff()]
+        if min_stars is not None:
+            sql += " AND stars >= ?"
+            params.append(min_stars)
+        return self._conn.execute(sql, params).fetchone()[0]
+
+    def select(self, limit=None, min_prs=0, min_stars=None, order_by='stars', within_top=None):
+        """Repositórios do índice no formato dos nós da busca, filtrados e ordenados.
+
+        `within_top` restringe a seleção aos N com mais estrelas antes de aplicar os filtros
+        (o critério original: os N mais populares que tenham ao menos `min_prs` PRs).
+        """
+        cutoff = self._cutoff()
+        candidates = "SELECT * FROM repositories WHERE fetched_at >= ?"
+        params = [cutoff]
+        if within_top is not None:
+            candidates += " ORDER BY stars DESC LIMIT ?"
+            params.append(within_top)
+        sql = f"SELECT * FROM ({candidates}) WHERE pull_requests >= ?"
+        params.append(min_prs)
+        if min_stars is not None:
+            sql += " AND stars >= ?"
+            params.append(min_stars)
+        sql += f" ORDER BY {ORDER_BY[order_by]}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [{'owner': {'login': row['owner']}, 'name': row['name'], 'stargazerCount': row['stars'],
+                 'pullRequests': {'totalCount': row['pull_requests']}}
+                for row in self._conn.execute(sql, params)]
+
+    def mark_crawled(self, full_names, crawled_at=None):
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE repositories SET last_crawled_at = ? WHERE full_name = ?",
+                                   [(crawled_at or _now(), name) for name in full_names])
+
+
+_INDEX = None
+
+def get_repo_index():
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = RepoIndex()
+    return _INDEX
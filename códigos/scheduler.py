@@ -0,0 +1,250 @@
+import asyncio
+import math
+import multiprocessing
+import os
+import time
+from collections import Counter, deque
+from multiprocessing.connection import wait
+
+from metrics import METRICS
+from query_planner import PR_PAGE_SIZE, max_raw_prs
+
+# --- CONFIGURAÇÕES ---
+# Tempo máximo de um repositório antes de o trabalho ser interrompido e reenfileirado
+JOB_TIMEOUT = float(os.getenv("REPO_JOB_TIMEOUT", "1800"))
+# Novas tentativas de um repositório que falhou ou passou do tempo
+JOB_RETRIES = int(os.getenv("REPO_JOB_RETRIES", "2"))
+# Intervalo entre verificações de tempo esgotado enquanto nenhum trabalho termina
+_POLL_SECONDS = 1.0
+_TIMEOUT_REASON = "tempo esgotado"
+_FAILED_REASON = "falhou"
+_DIED_REASON = "processo encerrado"
+
+
+def expected_cost(repo, max_prs=200):
+    """Páginas de PRs esperadas para um repositório, a partir do `pullRequests.totalCount`
+    da busca (limitado ao teto de PRs lidos por repositório)."""
+    total = (repo.get('pullRequests') or {}).get('totalCount') or 0
+    return math.ceil(min(total, max_raw_prs(max_prs)) / PR_PAGE_SIZE)
+
+
+def by_cost(repos, cost=expected_cost):
+    """Repositórios do mais caro para o mais barato: os maiores começam primeiro e os
+    pequenos preenchem o fim da fila, em vez de um repositório grande atrasar o término."""
+    return sorted(repos, key=cost, reverse=True)
+
+
+class _JobQueue:
+    """Fila principal (por custo) e fila de novas tentativas, servida quando a principal
+    esvazia, com a contagem de tentativas de cada trabalho."""
+
+    def __init__(self, jobs, retries):
+        self.pending = deque(range(len(jobs)))
+        self.retry = deque()
+        self.attempts = Counter()
+        self.retries = retries
+
+    def __bool__(self):
+        return bool(self.pending or self.retry)
+
+    def next(self):
+        index = self.pending.popleft() if self.pending else self.retry.popleft()
+        self.attempts[index] += 1
+        METRICS.observe('scheduler_queue_depth', len(self.pending) + len(self.retry))
+        return index
+
+    def requeue(self, index, label, reason):
+        """Reenfileira o trabalho se ainda houver tentativas; retorna False se desistiu."""
+        if self.attempts[index] > self.retries:
+            return False
+        self.retry.append(index)
+        METRICS.inc('retries_total', cause=_retry_cause(reason))
+        print(f"\n{label}: {reason}. Nova tentativa ({self.attempts[index]}/{self.retries}) no fim da fila.")
+        return True
+
+
+def _retry_cause(reason):
+    if reason.startswith(_TIMEOUT_REASON):
+        return 'job_timeout'
+    return 'job_failed' if reason == _FAILED_REASON else 'job_error'
+
+
+def _retry_reason(job, value, error, should_retry):
+    if error is not None:
+        return error
+    if should_retry is not None and should_retry(job, value):
+        return _FAILED_REASON
+    return None
+
+
+def _label(job):
+    try:
+        return f"{job['owner']['login']}/{job['name']}"
+    except (KeyError, TypeError):
+        return repr(job)
+
+
+# --- MOTOR DE PROCESSOS ---
+
+def _worker_loop(func, conn, initializer):
+    # Trabalhos e resultados passam pelo Pipe exclusivo deste processo: encerrá-lo no meio
+    # de um trabalho só inutiliza o próprio Pipe, nunca um canal usado pelos outros
+    if initializer is not None:
+        initializer()
+    for index, job in iter(conn.recv, None):
+        try:
+            conn.send((index, func(job), None))
+        except Exception as e:
+            conn.send((index, None, repr(e)))
+
+
+def imap_by_cost(func, jobs, processes, cost=expected_cost, timeout=JOB_TIMEOUT, retries=JOB_RETRIES,
+                 should_retry=None, initializer=None):
+    """Executa `func` em `processes` processos, entregando um trabalho de cada vez ao
+    processo que ficar livre (na ordem de by_cost), e devolve (job, resultado, erro)
+    conforme cada um termina, como o imap_unordered.
+
+    Um trabalho que passa de `timeout` segundos tem o processo encerrado (e substituído);
+    esse trabalho, os que levantaram exceção e aqueles em que `should_retry(job, resultado)`
+    é verdadeiro voltam numa fila de novas tentativas (até `retries` vezes). Depois da
+    última tentativa o erro é devolvido com resultado None.
+    """
+    jobs = by_cost(jobs, cost) if cost else list(jobs)
+    if not jobs:
+        return
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        raise RuntimeError("imap_by_cost precisa de fork (os processos herdam a configuração do principal).")
+    context = multiprocessing.get_context('fork')
+    job_queue = _JobQueue(jobs, retries)
+    workers = {}  # worker_id -> (processo, ponta do Pipe no processo principal)
+    running = {}  # worker_id -> (índice do trabalho, início, prazo)
+
+    def spawn(worker_id):
+        conn, child_conn = context.Pipe()
+        process = context.Process(target=_worker_loop, args=(func, child_conn, initializer), daemon=True)
+        process.start()
+        child_conn.close()
+        workers[worker_id] = (process, conn)
+
+    def replace(worker_id):
+        process, conn = workers[worker_id]
+        if process.is_alive():
+            process.terminate()
+        process.join()
+        conn.close()
+        spawn(worker_id)
+
+    started = time.monotonic()
+    try:
+        for worker_id in range(min(processes, len(jobs))):
+            spawn(worker_id)
+        METRICS.set('scheduler_workers', len(workers))
+        remaining = len(jobs)
+        while remaining:
+            for worker_id, (_, conn) in workers.items():
+                if worker_id not in running and job_queue:
+                    index = job_queue.next()
+                    try:
+                        conn.send((index, jobs[index]))
+                    except OSError:
+                        # Processo ocioso que morreu: o trabalho vai para um substituto
+                        replace(worker_id)
+                        workers[worker_id][1].send((index, jobs[index]))
+                    now = time.monotonic()
+                    running[worker_id] = (index, now, now + timeout)
+
+            finished = []
+            ready = wait([workers[worker_id][1] for worker_id in running], timeout=_POLL_SECONDS)
+            for worker_id in list(running):
+                if workers[worker_id][1] not in ready:
+                    continue
+                index, job_started, _ = running.pop(worker_id)
+                METRICS.inc('scheduler_busy_seconds_total', time.monotonic() - job_started)
+                try:
+                    finished.append(workers[worker_id][1].recv())
+                except (EOFError, OSError):
+                    # O processo morreu sem responder: é substituído e o trabalho, reenfileirado
+                    replace(worker_id)
+                    finished.append((index, None, _DIED_REASON))
+            now = time.monotonic()
+            for worker_id, (index, job_started, deadline) in list(running.items()):
+                if now > deadline:
+                    METRICS.inc('scheduler_busy_seconds_total', now - job_started)
+                    del running[worker_id]
+                    replace(worker_id)
+                    finished.append((index, None, f"{_TIMEOUT_REASON} ({timeout:.0f} s)"))
+
+            for index, value, error in finished:
+                reason = _retry_reason(jobs[index], value, error, should_retry)
+                if reason is not None and job_queue.requeue(index, _label(jobs[index]), reason):
+                    continue
+                remaining -= 1
+                METRICS.inc('scheduler_jobs_total', outcome='ok' if error is None else 'error')
+                yield jobs[index], value, error
+    finally:
+        METRICS.inc('scheduler_wall_seconds_total', time.monotonic() - started)
+        for process, conn in workers.values():
+            if process.is_alive():
+                try:
+                    conn.send(None)
+                except OSError:
+                    pass
+        for process, conn in workers.values():
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+            conn.close()
+
+
+# --- MOTOR ASSÍNCRONO ---
+
+async def as_completed_by_cost(coro_func, jobs, workers, cost=expected_cost, timeout=JOB_TIMEOUT,
+                               retries=JOB_RETRIES, should_retry=None):
+    """Versão assíncrona de imap_by_cost: `workers` tarefas retiram o próximo repositório da
+    fila por custo, cada trabalho tem `timeout` segundos (asyncio.wait_for) e os que falham
+    voltam na fila de novas tentativas. Gera (job, resultado, erro) conforme terminam."""
+    jobs = by_cost(jobs, cost) if cost else list(jobs)
+    job_queue = _JobQueue(jobs, retries)
+    completed = asyncio.Queue()
+    active = 0
+
+    async def worker():
+        while job_queue:
+            index = job_queue.next()
+            job_started = time.monotonic()
+            try:
+                value = await asyncio.wait_for(coro_func(jobs[index]), timeout)
+                error = None
+            except asyncio.TimeoutError:
+                value, error = None, f"{_TIMEOUT_REASON} ({timeout:.0f} s)"
+            except Exception as e:
+                value, error = None, repr(e)
+            METRICS.inc('scheduler_busy_seconds_total', time.monotonic() - job_started)
+            reason = _retry_reason(jobs[index], value, error, should_retry)
+            if reason is not None and job_queue.requeue(index, _label(jobs[index]), reason):
+                continue
+            METRICS.inc('scheduler_jobs_total', outcome='ok' if error is None else 'error')
+            await completed.put((jobs[index], value, error))
+
+    async def run_worker():
+        nonlocal active
+        try:
+            await worker()
+        finally:
+            active -= 1
+            if not active:
+                await completed.put(None)
+
+    active = min(workers, len(jobs))
+    if not active:
+        return
+    METRICS.set('scheduler_workers', active)
+    started = time.monotonic()
+    tasks = [asyncio.create_task(run_worker()) for _ in range(active)]
+    try:
+        while (item := await completed.get()) is not None:
+            yield item
+    finally:
+        METRICS.inc('scheduler_wall_seconds_total', time.monotonic() - started)
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,141 @@
+"""Estatísticas em map-reduce sobre os arquivos por repositório (resultados_csv/), sem
+montar o dataset_completo.csv.
+
+Map: cada repositório vira um ShardStats com agregados parciais (PRs e somas por status,
+sketches de quantis mescláveis, contagens por valor das colunas da RQ08 e as medianas
+exatas do próprio repositório), calculados em paralelo e guardados no cache em disco
+(compute_cache) com a chave = conteúdo do arquivo. Reduce: ShardedStats soma os
+parciais nas tabelas globais e nas entradas dos gráficos.
+
+Numa nova execução só os arquivos que mudaram são lidos de novo. As medianas globais vêm
+dos sketches (erro de posto ≤ ε, ver sketches.py); contagens, médias e o histograma 2D
+da RQ08 (cortes por quantil incluídos) são exatos.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analysis import TABLE_METRICS, USE_CACHE
+from compute_cache import ComputeCache, file_fingerprints
+from sketches import EPSILON, RANK_COLUMNS, StreamingStats, iter_chunks, sources
+from storage import to_typed_frame
+
+# --- CONFIGURAÇÕES ---
+# Usa os agregados por repositório em table.py e na RQ08 em vez do dataset combinado
+SHARDED = os.getenv('ANALYSIS_SHARDED', '0') == '1'
+SHARDS_DIR = os.getenv('SHARDS_DIR', './resultados_csv')
+# Versão do formato dos parciais (mudar invalida os que estão em cache)
+SHARD_VERSION = 1
+
+SUM_COLUMNS = RANK_COLUMNS + ['size_total_lines']
+INTERACTION_COLUMNS = ['interaction_participants', 'interaction_comments', 'reviews_count']
+_OPERATORS = {'<': np.less, '<=': np.less_equal}
+
+
+def count_quantile(counts, q):
+    """Quantil exato (interpolação linear, como no pandas) a partir de contagens por valor."""
+    counts = counts.sort_index()
+    values = counts.index.to_numpy(dtype=float)
+    cumulative = np.cumsum(counts.to_numpy())
+    position = q * (cumulative[-1] - 1)
+    lower, upper = (values[np.searchsorted(cumulative, p, side='right')] for p in (np.floor(position), np.ceil(position)))
+    return lower + (position - np.floor(position)) * (upper - lower)
+
+
+class ShardStats:
+    """Agregados parciais de um repositório."""
+
+    def __init__(self, repository, df, epsilon=EPSILON):
+        df = df.assign(size_total_lines=df['size_additions'] + df['size_deletions'])
+        by_status = df.groupby('status', observed=True)
+        self.repository = repository
+        self.counts = by_status.size()
+        self.sums = by_status[SUM_COLUMNS].sum()
+        self.medians = by_status[list(TABLE_METRICS)].median()
+        self.sketches = StreamingStats(epsilon).update(df)
+        # PRs por combinação (participantes, comentários, revisões)
+        self.interactions = df.groupby(INTERACTION_COLUMNS).size()
+
+
+class ShardedStats:
+    """Resultado do reduce: agregados globais e os parciais de cada repositório."""
+
+    def __init__(self, shards, epsilon=EPSILON):
+        self.shards = shards
+        self.epsilon = epsilon
+        self.sketches = StreamingStats(epsilon)
+        for shard in shards:
+            self.sketches.merge(shard.sketches)
+        self.counts = pd.concat([s.counts for s in shards]).groupby(level=0, observed=True).sum()
+        self.sums = pd.concat([s.sums for s in shards]).groupby(level=0, observed=True).sum()
+        self.interactions = pd.concat([s.interactions for s in shards]).groupby(level=INTERACTION_COLUMNS).sum()
+
+    def median_table(self):
+        """Medianas aproximadas por status, no formato de AnalysisData.median_table."""
+        return self.sketches.median_table()
+
+    def mean_table(self):
+        """Número de PRs e média exata de cada métrica por status."""
+        table = self.sums[list(TABLE_METRICS)].div(self.counts, axis=0).rename(columns=TABLE_METRICS)
+        table.insert(0, 'PRs', self.counts)
+        return table
+
+    def repo_table(self):
+        """Por repositório e status: número de PRs e medianas exatas de cada métrica."""
+        frames = {}
+        for shard in self.shards:
+            if shard.counts.empty:
+                continue
+            table = shard.medians.rename(columns=TABLE_METRICS)
+            table.insert(0, 'PRs', shard.counts)
+            frames[shard.repository] = table
+        return pd.concat(frames, names=['repository'])
+
+    def interactions_filtered(self, conditions):
+        """Contagens da RQ08 (coluna 'count') só com as combinações que atendem a todas as
+        condições (coluna, operador, quantil), com os quantis exatos do dataset inteiro."""
+        counts = self.interactions.rename('count').reset_index()
+        mask = np.ones(len(counts), dtype=bool)
+        for column, op, q in conditions:
+            limit = count_quantile(self.interactions.groupby(level=column).sum(), q)
+            mask &= _OPERATORS[op](counts[column].to_numpy(), limit)
+        return counts[mask]
+
+
+def _map_shard(path, epsilon):
+    # Arquivos vazios ou sem as colunas esperadas viram parciais vazios (também em cache)
+    chunks = list(iter_chunks((path, None)))
+    df = pd.concat(chunks, ignore_index=True) if chunks else to_typed_frame([], columns=['status'] + RANK_COLUMNS)
+    return ShardStats(os.path.splitext(os.path.basename(path))[0], df, epsilon)
+
+
+def compute(path=SHARDS_DIR, epsilon=EPSILON, jobs=None, use_cache=USE_CACHE):
+    """Map (em paralelo, só para os arquivos sem parcial em cache) e reduce dos arquivos
+    por repositório de `path`."""
+    files = [f for f, _ in sources(path)] if os.path.isdir(path) else []
+    if not files:
+        raise FileNotFoundError(path)
+    params = (epsilon, SHARD_VERSION)
+    fingerprints = file_fingerprints(files) if use_cache else [None] * len(files)
+    caches = {f: ComputeCache(fingerprint) if use_cache else None for f, fingerprint in zip(files, fingerprints)}
+    shards = {f: caches[f].get('shard', params) if caches[f] else None for f in files}
+    stale = [f for f in files if shards[f] is None]
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(stale) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_map_shard, stale, [epsilon] * len(stale), chunksize=4))
+    else:
+        results = [_map_shard(f, epsilon) for f in stale]
+    for f, shard in zip(stale, results):
+        shards[f] = shard
+        if caches[f]:
+            caches[f].put('shard', params, shard, evict=False)
+    if use_cache and stale:
+        # Uma limpeza do cache para o lote inteiro, em vez de uma por arquivo
+        caches[stale[0]].evict()
+
+    print(f"Agregados por repositório: {len(files) - len(stale)} do cache, {len(stale)} recalculados.")
+    return ShardedStats([shards[f] for f in files], epsilon)
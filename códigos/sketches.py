@@ -0,0 +1,285 @@
+"""Estatísticas em streaming com sketches mescláveis: medianas por status e correlação de
+Spearman aproximada sem carregar o dataset inteiro na memória.
+
+Os dados são lidos em blocos (arquivos por repositório, row groups do Parquet combinado
+ou pedaços do CSV), cada bloco gera seus próprios sketches em paralelo e o resultado é
+a mescla de todos eles.
+
+Precisão (com `epsilon` = erro de posto normalizado):
+
+- Quantis (KLL): o valor devolvido para o quantil q tem posto entre (q - ε)·n e (q + ε)·n
+  com ~99% de confiança (k escolhido pela fórmula empírica do DataSketches,
+  ε ≈ 2,296 / k^0,9375). A mediana é um valor observado, sem a média dos dois centrais
+  que o pandas usa quando n é par.
+- Spearman: duas passadas. A primeira constrói um sketch por coluna; a segunda troca cada
+  valor pelo seu posto médio aproximado (erro ≤ ε) e acumula somas e produtos cruzados.
+  Como |cov(δu, v)| ≤ sd(δu)·sd(v) ≤ ε·σ_v e |Δσ| ≤ ε, o erro de cada coeficiente fica
+  abaixo de 2·(ε·(σ_u + σ_v + 2ε) + ε²) / (σ_u·σ_v), com σ os desvios dos postos
+  normalizados. Esse limite (pessimista) é calculado e devolvido para cada par.
+"""
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from storage import SCHEMA, load_dataset
+
+# --- CONFIGURAÇÕES ---
+# Usa os sketches em table.py e no heatmap em vez de carregar o dataset inteiro
+STREAMING = os.getenv('ANALYSIS_STREAMING', '0') == '1'
+EPSILON = float(os.getenv('ANALYSIS_EPSILON', '0.002'))
+CHUNK_ROWS = 200_000
+SEED = 42
+
+MEDIAN_METRICS = ['size_files', 'size_total_lines', 'analysis_time_hours', 'description_chars',
+                  'interaction_participants', 'interaction_comments']
+RANK_COLUMNS = [c for c in SCHEMA if c not in ('repository', 'status')]
+_READ_COLUMNS = ['status'] + RANK_COLUMNS
+
+
+def kll_k(epsilon):
+    """Parâmetro k do KLL para um erro de posto normalizado `epsilon` (~99% de confiança)."""
+    return max(8, int(np.ceil((2.296 / epsilon) ** (1 / 0.9375))))
+
+
+class KLLSketch:
+    """Sketch de quantis KLL: níveis de itens com peso 2^h, compactados pela metade quando
+    passam da capacidade. Aceita lotes de valores (NumPy) e mescla com outros sketches."""
+
+    def __init__(self, k, seed=SEED):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+        self._sorted = None
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self):
+        self._sorted = None
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                items = np.sort(items)
+                # Número par de itens compactados; o que sobrar fica no nível
+                keep = items[:len(items) % 2]
+                promoted = items[len(keep):][self._rng.integers(2)::2]
+                self.levels[level] = keep
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def _weighted(self):
+        if self._sorted is None:
+            items = np.concatenate(self.levels)
+            weights = np.concatenate([np.full(len(items), 2 ** level) for level, items in enumerate(self.levels)])
+            order = np.argsort(items, kind='stable')
+            self._sorted = items[order], np.cumsum(weights[order])
+        return self._sorted
+
+    def cdf(self, values, inclusive=True):
+        """Fração aproximada de itens ≤ `values` (ou < com inclusive=False)."""
+        items, cumulative = self._weighted()
+        positions = np.searchsorted(items, values, side='right' if inclusive else 'left')
+        below = np.where(positions > 0, cumulative[np.maximum(positions - 1, 0)], 0)
+        return below / cumulative[-1]
+
+    def quantile(self, q):
+        items, cumulative = self._weighted()
+        if not len(items):
+            return np.nan
+        return items[min(np.searchsorted(cumulative, q * cumulative[-1]), len(items) - 1)]
+
+
+# --- LEITURA EM BLOCOS ---
+
+def sources(path):
+    """Blocos independentes do dataset: um por arquivo num diretório, um por row group
+    num Parquet e o arquivo inteiro (lido em pedaços) num CSV."""
+    if os.path.isdir(path):
+        files = sorted(glob.glob(os.path.join(path, '*.parquet'))) or sorted(glob.glob(os.path.join(path, '*.csv')))
+        return [(f, None) for f in files]
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return [(path, group) for group in range(pq.ParquetFile(path).num_row_groups)]
+    return [(path, None)]
+
+
+def iter_chunks(source):
+    path, row_group = source
+    if row_group is not None:
+        import pyarrow.parquet as pq
+        df = pq.ParquetFile(path).read_row_group(row_group, columns=_READ_COLUMNS).to_pandas()
+        yield df.astype({c: SCHEMA[c] for c in _READ_COLUMNS})
+    elif path.endswith('.parquet'):
+        yield load_dataset(path, columns=_READ_COLUMNS)
+    else:
+        try:
+            yield from pd.read_csv(path, usecols=_READ_COLUMNS, chunksize=CHUNK_ROWS,
+                                   dtype={c: SCHEMA[c] for c in _READ_COLUMNS})
+        except (pd.errors.EmptyDataError, ValueError):
+            # CSV por repositório vazio ou sem as colunas esperadas
+            return
+
+
+def _with_total_lines(df):
+    return df.assign(size_total_lines=df['size_additions'] + df['size_deletions'])
+
+
+# --- PRIMEIRA PASSADA: QUANTIS ---
+
+class StreamingStats:
+    """Sketches de uma ou mais partes do dataset: um por (status, métrica) para a tabela
+    de medianas e um por coluna numérica para os postos do Spearman."""
+
+    def __init__(self, epsilon=EPSILON):
+        self.epsilon = epsilon
+        self.k = kll_k(epsilon)
+        self.by_status = {}
+        self.columns = {c: KLLSketch(self.k) for c in RANK_COLUMNS}
+
+    def update(self, df):
+        df = _with_total_lines(df)
+        for column, sketch in self.columns.items():
+            sketch.update(df[column].to_numpy(dtype=float))
+        for status, group in df.groupby('status', observed=True):
+            for metric in MEDIAN_METRICS:
+                key = (status, metric)
+                if key not in self.by_status:
+                    self.by_status[key] = KLLSketch(self.k)
+                self.by_status[key].update(group[metric].to_numpy(dtype=float))
+        return self
+
+    def merge(self, other):
+        for column, sketch in other.columns.items():
+            self.columns[column].merge(sketch)
+        for key, sketch in other.by_status.items():
+            if key not in self.by_status:
+                # Cópia: o sketch de `other` continua independente deste
+                self.by_status[key] = KLLSketch(self.k)
+            self.by_status[key].merge(sketch)
+        return self
+
+    def median_table(self):
+        """Mesmo formato de AnalysisData.median_table (status nas linhas)."""
+        from analysis import TABLE_METRICS
+        statuses = [s for s in SCHEMA['status'].categories if (s, MEDIAN_METRICS[0]) in self.by_status]
+        table = pd.DataFrame({metric: [self.by_status[(s, metric)].quantile(0.5) for s in statuses]
+                              for metric in TABLE_METRICS}, index=pd.Index(statuses, name='status'))
+        return table.rename(columns=TABLE_METRICS)
+
+
+def _sketch_source(source, epsilon):
+    stats = StreamingStats(epsilon)
+    for chunk in iter_chunks(source):
+        stats.update(chunk)
+    return stats
+
+
+# --- SEGUNDA PASSADA: MOMENTOS DOS POSTOS ---
+
+class RankMoments:
+    """Somas dos postos normalizados aproximados e dos seus produtos cruzados."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.n = 0
+        self.sums = np.zeros(len(RANK_COLUMNS))
+        self.products = np.zeros((len(RANK_COLUMNS), len(RANK_COLUMNS)))
+
+    def update(self, df):
+        # Posto médio (empates recebem a média das posições), normalizado em [0, 1]
+        ranks = np.column_stack([
+            (self.columns[c].cdf(df[c].to_numpy(dtype=float), inclusive=False)
+             + self.columns[c].cdf(df[c].to_numpy(dtype=float))) / 2
+            for c in RANK_COLUMNS])
+        self.n += len(ranks)
+        self.sums += ranks.sum(axis=0)
+        self.products += ranks.T @ ranks
+        return self
+
+    def merge(self, other):
+        self.n += other.n
+        self.sums += other.sums
+        self.products += other.products
+        return self
+
+    def spearman(self, epsilon):
+        """Matriz de Spearman aproximada e o limite de erro de cada coeficiente."""
+        mean = self.sums / self.n
+        cov = self.products / self.n - np.outer(mean, mean)
+        sd = np.sqrt(np.diag(cov))
+        corr = cov / np.outer(sd, sd)
+        bound = 2 * (epsilon * (sd[:, None] + sd[None, :] + 2 * epsilon) + epsilon ** 2) / np.outer(sd, sd)
+        np.fill_diagonal(corr, 1.0)
+        np.fill_diagonal(bound, 0.0)
+        as_frame = lambda m: pd.DataFrame(m, index=RANK_COLUMNS, columns=RANK_COLUMNS)
+        return as_frame(np.clip(corr, -1, 1)), as_frame(bound)
+
+
+def _rank_source(source, columns):
+    moments = RankMoments(columns)
+    for chunk in iter_chunks(source):
+        moments.update(chunk)
+    return moments
+
+
+# --- EXECUÇÃO ---
+
+def _map_merge(function, items, jobs, *args):
+    result = None
+    if jobs > 1 and len(items) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            parts = executor.map(function, items, *[[a] * len(items) for a in args], chunksize=8)
+            for part in parts:
+                result = part if result is None else result.merge(part)
+    else:
+        for item in items:
+            part = function(item, *args)
+            result = part if result is None else result.merge(part)
+    return result
+
+
+def compute_stats(path, epsilon=EPSILON, jobs=None):
+    """Primeira passada: sketches de quantis de todo o dataset (em paralelo por bloco)."""
+    items = sources(path)
+    if not items:
+        raise FileNotFoundError(path)
+    return _map_merge(_sketch_source, items, jobs or os.cpu_count() or 1, epsilon)
+
+
+def median_table(path, epsilon=EPSILON, jobs=None):
+    return compute_stats(path, epsilon, jobs).median_table()
+
+
+def spearman_matrix(path, epsilon=EPSILON, jobs=None, stats=None):
+    """Spearman aproximado em duas passadas; devolve (matriz, limite de erro por par)."""
+    jobs = jobs or os.cpu_count() or 1
+    stats = stats or compute_stats(path, epsilon, jobs)
+    moments = _map_merge(_rank_source, sources(path), jobs, stats.columns)
+    return moments.spearman(stats.epsilon)
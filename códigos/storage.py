@@ -0,0 +1,140 @@
+import glob
+import os
+
+import pandas as pd
+
+# --- ESQUEMA DO DATASET ---
+# Mesma ordem de colunas dos CSVs gerados por process_and_save_repo. As categorias de
+# `status` seguem a ordem usada nas paletas dos gráficos (verde = MERGED, vermelho = CLOSED).
+SCHEMA = {
+    'repository': 'category',
+    'status': pd.CategoricalDtype(['MERGED', 'CLOSED']),
+    'analysis_time_hours': 'float64',
+    'size_files': 'int32',
+    'size_additions': 'int32',
+    'size_deletions': 'int32',
+    'description_chars': 'int32',
+    'interaction_participants': 'int32',
+    'interaction_comments': 'int32',
+    'reviews_count': 'int32',
+}
+COLUMNS = list(SCHEMA)
+
+
+def to_typed_frame(data, columns=None):
+    """Converte linhas (lista de dicts ou DataFrame) para os tipos do esquema."""
+    columns = columns or COLUMNS
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data, columns=COLUMNS)
+    if df.empty:
+        df = pd.DataFrame(columns=columns)
+    return df[columns].astype({c: SCHEMA[c] for c in columns})
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ImportError("O formato Parquet precisa do pacote 'pyarrow' (pip install pyarrow).") from e
+
+
+def _arrow_schema(columns=None):
+    import pyarrow as pa
+    arrow_types = {'category': pa.dictionary(pa.int32(), pa.string()), 'float64': pa.float64(), 'int32': pa.int32()}
+    return pa.schema([(c, arrow_types[str(SCHEMA[c])]) for c in (columns or COLUMNS)])
+
+
+class CsvStorage:
+    """Um CSV de texto por repositório, como nas coletas originais."""
+
+    name = 'csv'
+    extension = '.csv'
+    default_output_dir = 'resultados_csv'
+
+    def write_repo(self, rows, filepath):
+        frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+        if len(frame):
+            frame.to_csv(filepath, index=False)
+        else:
+            pd.DataFrame([]).to_csv(filepath)
+
+    def read_repo(self, filepath):
+        try:
+            # round_trip: os valores existentes voltam exatamente como foram gravados
+            return to_typed_frame(pd.read_csv(filepath, float_precision='round_trip'))
+        except (FileNotFoundError, pd.errors.EmptyDataError, KeyError):
+            return to_typed_frame([])
+
+
+class ParquetStorage:
+    """Um arquivo Parquet tipado por repositório (partição), lido coluna a coluna.
+
+    O diretório de saída forma um dataset Parquet particionado por repositório e pode ser
+    carregado diretamente com load_dataset, sem precisar do arquivo combinado.
+    """
+
+    name = 'parquet'
+    extension = '.parquet'
+    default_output_dir = 'resultados_parquet'
+
+    def write_repo(self, rows, filepath):
+        _require_pyarrow()
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(to_typed_frame(rows), schema=_arrow_schema(), preserve_index=False)
+        pq.write_table(table, filepath)
+
+    def read_repo(self, filepath):
+        if not os.path.exists(filepath):
+            return to_typed_frame([])
+        return to_typed_frame(pd.read_parquet(filepath))
+
+    def combine(self, input_dir, output_file):
+        """Junta os arquivos por repositório num único Parquet, um row group por repositório,
+        sem carregar o dataset inteiro na memória."""
+        _require_pyarrow()
+        import pyarrow.parquet as pq
+        print(f"\nCombinando arquivos Parquet do diretório '{input_dir}'...")
+        all_files = sorted(glob.glob(os.path.join(input_dir, f"*{self.extension}")))
+        if not all_files:
+            print("Nenhum arquivo Parquet para combinar.")
+            return
+        total = 0
+        schema = _arrow_schema()
+        with pq.ParquetWriter(output_file, schema) as writer:
+            for file in all_files:
+                table = pq.read_table(file)
+                if table.num_rows == 0:
+                    continue
+                writer.write_table(table.cast(schema))
+                total += table.num_rows
+        print(f"Total de {total} registros salvos no arquivo final '{output_file}'")
+
+
+STORAGES = {'csv': CsvStorage, 'parquet': ParquetStorage}
+_DEFAULT_STORAGE = os.getenv("STORAGE_FORMAT", "csv")
+
+def configure(name):
+    """Define o formato usado pela coleta (chamado por main() antes de iniciar os workers)."""
+    global _DEFAULT_STORAGE
+    if name not in STORAGES:
+        raise ValueError(f"Formato de armazenamento desconhecido: {name}")
+    if name == 'parquet':
+        _require_pyarrow()
+    _DEFAULT_STORAGE = name
+
+def get_storage(name=None):
+    return STORAGES[name or _DEFAULT_STORAGE]()
+
+
+def load_dataset(path, columns=None):
+    """Carrega o dataset (CSV, arquivo Parquet ou diretório de Parquets por repositório)
+    lendo apenas as colunas pedidas e já com os tipos do esquema."""
+    columns = list(columns) if columns else None
+    if os.path.isdir(path) or path.endswith('.parquet'):
+        _require_pyarrow()
+        df = pd.read_parquet(path, columns=columns)
+    else:
+        df = pd.read_csv(path, usecols=columns, dtype={c: SCHEMA[c] for c in (columns or COLUMNS)})
+    known = [c for c in df.columns if c in SCHEMA]
+    return df.astype({c: SCHEMA[c] for c in known})
@@ -1,38 +1,41 @@
-import pandas as pd
+import shard_stats
+import sketches
+from analysis import DATASET_PATH, in_table_order, open_analysis
 
-# Caminho para o arquivo do dataset, conforme solicitado
-file_path = './dataset_completo.csv'
+# Caminho para o arquivo do dataset (CSV ou Parquet), conforme solicitado
+file_path = DATASET_PATH
+# Medianas de cada repositório (modo por repositório, ANALYSIS_SHARDED=1)
+repo_table_path = 'medianas_por_repositorio.csv'
 
 try:
-    # Carregar o dataset a partir do arquivo CSV
-    df = pd.read_csv(file_path)
-    print(f"Dataset carregado com sucesso do caminho: {file_path}")
-
-    # Criar a métrica 'Tamanho (Linhas Add+Del)'
-    df['size_lines_total'] = df['size_additions'] + df['size_deletions']
-
-    # Definir as colunas que queremos analisar e seus nomes na tabela
-    metrics_to_analyze = {
-        'size_files': 'Tamanho (Arquivos)',
-        'size_lines_total': 'Tamanho (Linhas Add+Del)',
-        'analysis_time_hours': 'Tempo de Análise (Horas)',
-        'description_chars': 'Descrição (Caracteres)',
-        'interaction_participants': 'Interações (Participantes)',
-        'interaction_comments': 'Interações (Comentários)'
-    }
-
-    # Agrupar por status e calcular a mediana para cada métrica
-    median_results = df.groupby('status')[list(metrics_to_analyze.keys())].median()
-
-    # Renomear as colunas para a tabela final
-    median_results = median_results.rename(columns=metrics_to_analyze)
+    if shard_stats.SHARDED:
+        # Map-reduce sobre os arquivos por repositório, sem o dataset combinado (ver shard_stats.py)
+        file_path = shard_stats.SHARDS_DIR
+        stats = shard_stats.compute(file_path)
+        median_results = stats.median_table()
+        print(f"Medianas aproximadas de '{file_path}' (erro de posto ≤ {sketches.EPSILON:.2%})")
+        print("\n### PRs e valores médios por status ###")
+        print(in_table_order(stats.mean_table()).transpose())
+        stats.repo_table().to_csv(repo_table_path)
+        print(f"Medianas por repositório salvas em '{repo_table_path}'.")
+    elif sketches.STREAMING:
+        # Medianas aproximadas por sketches, lendo o dataset em blocos (ver sketches.py)
+        median_results = sketches.median_table(file_path)
+        print(f"Medianas aproximadas de '{file_path}' (erro de posto ≤ {sketches.EPSILON:.2%})")
+    else:
+        # Carregar o dataset e criar a métrica 'Tamanho (Linhas Add+Del)'
+        data = open_analysis(file_path)
+        print(f"Dataset carregado com sucesso do caminho: {file_path}")
+
+        # Agrupar por status e calcular a mediana para cada métrica, já com os nomes da tabela final
+        median_results = data.median_table()
 
     # Exibir os resultados transpostos para facilitar a cópia
     print("\n### Valores medianos para a Tabela ###")
-    print(median_results.transpose())
+    print(in_table_order(median_results).transpose())
 
 except FileNotFoundError:
     print(f"Erro: O arquivo não foi encontrado no caminho especificado: {file_path}")
     print("Por favor, certifique-se de que o arquivo 'dataset_completo.csv' está no mesmo diretório que o script.")
 except Exception as e:
-    print(f"Ocorreu um erro ao processar o arquivo: {e}")
\ No newline at end of file
+    print(f"Ocorreu um erro ao processar o arquivo: {e}")
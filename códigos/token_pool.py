@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+
+from rate_limit import RateLimitScheduler
+
+# --- CONFIGURAÇÕES ---
+# Orçamento assumido para um token que ainda não recebeu resposta da API
+DEFAULT_BUDGET = 5000
+
+
+class NoTokenAvailableError(Exception):
+    """Todos os tokens foram revogados ou rejeitados pela API."""
+
+
+def load_tokens():
+    """Lê os tokens de TOKENS (separados por vírgula/espaço), de TOKENS_FILE
+    (um por linha, '#' para comentários) e, por compatibilidade, de TOKEN."""
+    tokens = []
+    for token in os.getenv("TOKENS", "").replace(',', ' ').split():
+        tokens.append(token)
+    tokens_file = os.getenv("TOKENS_FILE")
+    if tokens_file:
+        with open(tokens_file, encoding='utf-8') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    tokens.append(line)
+    if os.getenv("TOKEN"):
+        tokens.append(os.getenv("TOKEN"))
+    # Remove duplicados mantendo a ordem
+    return list(dict.fromkeys(tokens))
+
+
+class TokenState:
+    """Um token com seu próprio agendador de limite de taxa e estatísticas de uso."""
+
+    def __init__(self, token, index):
+        self.token = token
+        self.label = f"token#{index}"
+        self.scheduler = RateLimitScheduler()
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.disabled_reason = None
+
+    @property
+    def headers(self):
+        return {'Authorization': f'bearer {self.token}', 'Content-Type': 'application/json'}
+
+    def budget(self):
+        scheduler = self.scheduler
+        if scheduler.remaining is None or scheduler.reset_at is None or time.time() >= scheduler.reset_at:
+            return scheduler.limit or DEFAULT_BUDGET
+        return scheduler.remaining - scheduler.reserve
+
+    def available_at(self):
+        """Quando o token volta a poder enviar queries (agora, se tiver orçamento)."""
+        scheduler = self.scheduler
+        at = scheduler.paused_until
+        if self.budget() < 1 and scheduler.reset_at is not None:
+            at = max(at, scheduler.reset_at + 1)
+        return at
+
+    def usage(self):
+        return {
+            'requests': self.requests, 'points_used': self.scheduler.points_used,
+            'rate_limited': self.rate_limited, 'errors': self.errors,
+            'remaining': self.scheduler.remaining,
+            'status': f"revogado ({self.disabled_reason})" if self.disabled_reason else 'ativo',
+        }
+
+
+class TokenPool:
+    """Distribui as queries entre vários tokens, sempre pelo de maior orçamento restante."""
+
+    def __init__(self, tokens):
+        self.states = [TokenState(token, i + 1) for i, token in enumerate(tokens)]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.active())
+
+    def active(self):
+        return [s for s in self.states if s.disabled_reason is None]
+
+    def acquire(self):
+        """Escolhe o token para a próxima query. Tokens pausados só são escolhidos
+        se todos estiverem pausados; nesse caso, o que volta primeiro."""
+        with self._lock:
+            active = self.active()
+            if not active:
+                raise NoTokenAvailableError("Nenhum token do GitHub disponível.")
+            now = time.time()
+            ready = [s for s in active if s.available_at() <= now]
+            if ready:
+                state = max(ready, key=lambda s: s.budget())
+            else:
+                state = min(active, key=lambda s: s.available_at())
+            state.requests += 1
+            return state
+
+    def revoke(self, state, reason):
+        """Tira o token de rotação (ex.: 401 ou token sem permissão)."""
+        with self._lock:
+            if state.disabled_reason is None:
+                state.disabled_reason = reason
+                print(f"\nAVISO: {state.label} removido da rotação: {reason}")
+
+    def usage(self):
+        return {s.label: s.usage() for s in self.states}
+
+    def reset_stats(self):
+        """Zera os contadores (usado nos processos filhos, que herdam os do pai)."""
+        for s in self.states:
+            s.requests = s.rate_limited = s.errors = 0
+            s.scheduler.points_used = 0
+
+
+def merge_usage(usages):
+    """Soma as estatísticas de vários processos (motor pool) por token."""
+    merged = {}
+    for usage in usages:
+        for label, stats in usage.items():
+            total = merged.setdefault(label, {'requests': 0, 'points_used': 0, 'rate_limited': 0,
+                                              'errors': 0, 'remaining': None, 'status': 'ativo'})
+            for key in ('requests', 'points_used', 'rate_limited', 'errors'):
+                total[key] += stats[key]
+            if stats['remaining'] is not None:
+                total['remaining'] = stats['remaining'] if total['remaining'] is None else min(total['remaining'], stats['remaining'])
+            if stats['status'] != 'ativo':
+                total['status'] = stats['status']
+    return merged
+
+
+def print_usage_report(usage):
+    print("\n### Uso por token ###")
+    for label, stats in usage.items():
+        print(f"{label}: {stats['requests']} queries, {stats['points_used']} pontos, "
+              f"{stats['rate_limited']} limites de taxa, {stats['errors']} erros, "
+              f"restante={stats['remaining']}, {stats['status']}")
+
+
+# Pool compartilhado: todas as queries do processo passam por ele
+TOKEN_POOL = TokenPool(load_tokens())
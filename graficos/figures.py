@@ -0,0 +1,295 @@
+import os
+import sys
+
+import pandas as pd
+import matplotlib
+# Só gera arquivos: backend sem interface gráfica, também nos processos do report.py
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'códigos'))
+from analysis import NUMERIC_COLUMNS, in_table_order
+import fast_plots
+
+# Paleta dos gráficos por status (MERGED, CLOSED)
+STATUS_PALETTE = ['#2ca02c', '#d62728']
+
+# Arquivos gravados por save_figure desde o último clear() (report.py os registra no
+# manifesto de render_cache)
+SAVED = []
+
+
+def save_figure(filename):
+    """Grava a figura atual e a fecha, liberando a memória dela."""
+    figure = plt.gcf()
+    figure.savefig(filename)
+    plt.close(figure)
+    SAVED.append(filename)
+
+
+# Filtros de cada RQ: (coluna, operador, quantil). Cada gráfico pede só as colunas que usa,
+# e o backend DuckDB (lazy_analysis) lê só essas colunas do disco
+RQ01_FILTER = (('size_files', '<', 0.8), ('size_total_lines', '<', 0.8))
+RQ05_FILTER = RQ01_FILTER + (('reviews_count', '<', 0.95),)
+RQ02_FILTER = (('analysis_time_hours', '<=', 0.8),)
+RQ06_FILTER = (('analysis_time_hours', '<=', 0.8), ('reviews_count', '<=', 0.8))
+RQ03_FILTER = (('description_chars', '<=', 0.9),)
+RQ07_FILTER = (('description_chars', '<=', 0.9), ('reviews_count', '<=', 0.9))
+RQ08_FILTER = (('interaction_participants', '<=', 0.9), ('interaction_comments', '<=', 0.9),
+               ('reviews_count', '<=', 0.9))
+
+
+# --- Gráficos para a RQ01 (Focando na distribuição principal) ---
+def render_rq01(data):
+    df_filtered_rq01 = data.filtered(*RQ01_FILTER, columns=['status', 'size_files', 'size_total_lines'])
+    print(f"\nPara os gráficos da RQ01, estamos focando nos dados abaixo do 95º percentil.")
+
+    with sns.axes_style("whitegrid"):
+        # 1. Box plot: Número de Arquivos vs. Status (com zoom)
+        plt.figure(figsize=(10, 7))
+        sns.boxplot(x='status', y='size_files', data=df_filtered_rq01, palette=STATUS_PALETTE)
+        plt.title('RQ01: Número de Arquivos por Status do PR (Foco em 80% dos Dados)', fontsize=16)
+        plt.xlabel('Status Final do PR', fontsize=12)
+        plt.ylabel('Número de Arquivos Modificados', fontsize=12)
+        plt.tight_layout()
+        save_figure('rq01_arquivos_vs_status_zoom.png')
+        print("Gráfico 'rq01_arquivos_vs_status_zoom.png' salvo.")
+
+        # 2. Box plot: Total de Linhas vs. Status (com zoom)
+        plt.figure(figsize=(10, 7))
+        sns.boxplot(x='status', y='size_total_lines', data=df_filtered_rq01, palette=STATUS_PALETTE)
+        plt.title('RQ01: Total de Linhas por Status do PR (Foco em 80% dos Dados)', fontsize=16)
+        plt.xlabel('Status Final do PR', fontsize=12)
+        plt.ylabel('Total de Linhas Modificadas (Add+Del)', fontsize=12)
+        plt.tight_layout()
+        save_figure('rq01_linhas_vs_status_zoom.png')
+        print("Gráfico 'rq01_linhas_vs_status_zoom.png' salvo.")
+
+
+# --- Gráficos para a RQ05 (Focando na tendência principal) ---
+def render_rq05(data, fast=False):
+    df_filtered_rq05 = data.filtered(*RQ05_FILTER, columns=['size_files', 'size_total_lines', 'reviews_count'])
+    print(f"\nPara os gráficos da RQ05, também focamos no 95º percentil.")
+
+    with sns.axes_style("whitegrid"):
+        # 3. Scatter plot: Número de Arquivos vs. Número de Revisões (com zoom)
+        plt.figure(figsize=(10, 7))
+        if fast:
+            fraction = fast_plots.regplot(df_filtered_rq05, 'size_files', 'reviews_count',
+                                          scatter_kws={'alpha':0.6}, line_kws={'color':'red'})
+            print(f"Modo rápido: dispersão com {fraction:.1%} dos pontos; reta ajustada com todos.")
+        else:
+            sns.regplot(x='size_files', y='reviews_count', data=df_filtered_rq05,
+                        scatter_kws={'alpha':0.6}, line_kws={'color':'red'})
+        plt.title('RQ05: Arquivos vs. Revisões (Foco em 80% dos Dados)', fontsize=16)
+        plt.xlabel('Número de Arquivos Modificados', fontsize=12)
+        plt.ylabel('Número de Revisões', fontsize=12)
+        plt.tight_layout()
+        save_figure('rq05_arquivos_vs_revisoes_zoom.png')
+        print("Gráfico 'rq05_arquivos_vs_revisoes_zoom.png' salvo.")
+
+        # 4. Scatter plot: Total de Linhas vs. Número de Revisões (com zoom)
+        plt.figure(figsize=(10, 7))
+        if fast:
+            fraction = fast_plots.regplot(df_filtered_rq05, 'size_total_lines', 'reviews_count',
+                                          scatter_kws={'alpha':0.6}, line_kws={'color':'red'})
+            print(f"Modo rápido: dispersão com {fraction:.1%} dos pontos; reta ajustada com todos.")
+        else:
+            sns.regplot(x='size_total_lines', y='reviews_count', data=df_filtered_rq05,
+                        scatter_kws={'alpha':0.6}, line_kws={'color':'red'})
+        plt.title('RQ05: Linhas vs. Revisões (Foco em 80% dos Dados)', fontsize=16)
+        plt.xlabel('Total de Linhas Modificadas (Add+Del)', fontsize=12)
+        plt.ylabel('Número de Revisões', fontsize=12)
+        plt.tight_layout()
+        save_figure('rq05_linhas_vs_revisoes_zoom.png')
+        print("Gráfico 'rq05_linhas_vs_revisoes_zoom.png' salvo.")
+
+
+# --- Gráfico para a RQ02: Relação entre Tempo e Status do PR ---
+def render_rq02(data, fast=False):
+    # Filtrar os 20% de PRs com maior tempo de análise para focar na distribuição principal
+    time_limit_rq02 = data.quantile('analysis_time_hours', 0.80)
+    df_filtered_rq02 = data.filtered(*RQ02_FILTER, columns=['status', 'analysis_time_hours'])
+    print(f"\nPara o gráfico da RQ02, focando em PRs com tempo de análise abaixo de {time_limit_rq02:.2f} horas (80º percentil).")
+
+    with sns.axes_style("whitegrid"):
+        # 1. Violin Plot: Tempo de Análise vs. Status
+        plt.figure(figsize=(10, 7))
+        if fast:
+            error = fast_plots.violinplot(df_filtered_rq02, 'status', 'analysis_time_hours', STATUS_PALETTE)
+            print(f"Modo rápido: erro máximo da KDE de {error:.2%} do pico da densidade.")
+        else:
+            sns.violinplot(x='status', y='analysis_time_hours', data=df_filtered_rq02, palette=STATUS_PALETTE)
+        plt.title('RQ02: Distribuição do Tempo de Análise por Status do PR (Foco em 80% dos Dados)', fontsize=16)
+        plt.xlabel('Status Final do PR', fontsize=12)
+        plt.ylabel('Tempo de Análise (Horas)', fontsize=12)
+        plt.tight_layout()
+        save_figure('rq02_violin_tempo_vs_status_80pct.png')
+        print("Gráfico 'rq02_violin_tempo_vs_status_80pct.png' salvo.")
+
+
+# --- Gráfico para a RQ06: Relação entre Tempo e Número de Revisões ---
+def render_rq06(data, fast=False):
+    # Filtrar outliers de tempo e revisões para focar na densidade principal (80%)
+    df_filtered_rq06 = data.filtered(*RQ06_FILTER, columns=['analysis_time_hours', 'reviews_count'])
+    print(f"Para o gráfico da RQ06, focando nos 80% dos dados com menores valores.")
+
+    with sns.axes_style("whitegrid"):
+        # 2. 2D Density Plot (KDE): Tempo de Análise vs. Número de Revisões
+        plt.figure(figsize=(12, 8))
+        if fast:
+            error = fast_plots.kdeplot_2d(df_filtered_rq06, 'analysis_time_hours', 'reviews_count',
+                                          cmap='mako', thresh=0.05)
+            print(f"Modo rápido: erro máximo da KDE de {error:.2%} do pico da densidade.")
+        else:
+            sns.kdeplot(
+                data=df_filtered_rq06,
+                x='analysis_time_hours',
+                y='reviews_count',
+                fill=True,
+                thresh=0.05,
+                cmap='mako'
+            )
+        plt.title('RQ06: Densidade de PRs por Tempo de Análise vs. Revisões (Foco em 80% dos Dados)', fontsize=16)
+        plt.xlabel('Tempo de Análise (Horas)', fontsize=12)
+        plt.ylabel('Número de Revisões', fontsize=12)
+        plt.tight_layout()
+        save_figure('rq06_kde_tempo_vs_revisoes_80pct.png')
+        print("Gráfico 'rq06_kde_tempo_vs_revisoes_80pct.png' salvo.")
+
+
+# --- Gráfico para a RQ03: Relação entre Descrição e Status do PR ---
+def render_rq03(data, fast=False):
+    # Filtrar os 10% de PRs com as maiores descrições para focar na distribuição principal
+    desc_limit_rq03 = data.quantile('description_chars', 0.90)
+    df_filtered_rq03 = data.filtered(*RQ03_FILTER, columns=['status', 'description_chars'])
+    print(f"\nPara o gráfico da RQ03, focando em PRs com descrição abaixo de {desc_limit_rq03:.0f} caracteres (90º percentil).")
+
+    with sns.axes_style("whitegrid"):
+        # 1. Overlapping Density Plots (Ridge Plot)
+        plt.figure(figsize=(12, 7))
+        if fast:
+            error = fast_plots.kdeplot_1d(df_filtered_rq03, 'description_chars', 'status', STATUS_PALETTE)
+            print(f"Modo rápido: erro máximo da KDE de {error:.2%} do pico da densidade.")
+        else:
+            sns.kdeplot(data=df_filtered_rq03, x='description_chars', hue='status',
+                        fill=True, alpha=0.5, common_norm=False, palette=STATUS_PALETTE)
+        plt.title('RQ03: Distribuição do Tamanho da Descrição por Status do PR (Foco em 90% dos Dados)', fontsize=16)
+        plt.xlabel('Tamanho da Descrição (Caracteres)', fontsize=12)
+        plt.ylabel('Densidade', fontsize=12)
+        plt.tight_layout()
+        save_figure('rq03_ridge_descricao_vs_status.png')
+        print("Gráfico 'rq03_ridge_descricao_vs_status.png' salvo.")
+
+
+# --- Gráfico para a RQ07: Relação entre Descrição e Número de Revisões ---
+def render_rq07(data):
+    # Filtrar outliers de descrição e revisões para focar na tendência principal (90%)
+    df_filtered_rq07 = data.filtered(*RQ07_FILTER, columns=['description_chars', 'reviews_count'])
+    print(f"Para o gráfico da RQ07, focando nos 90% dos dados com menores valores.")
+
+    # 2. Bar Plot com Dados Binarizados
+    # Criar 4 bins (categorias) para o tamanho da descrição
+    df_filtered_rq07 = df_filtered_rq07.assign(description_bin=pd.qcut(
+        df_filtered_rq07['description_chars'], q=4, labels=['Muito Curta', 'Curta', 'Média', 'Longa']))
+
+    with sns.axes_style("whitegrid"):
+        plt.figure(figsize=(10, 7))
+        sns.barplot(data=df_filtered_rq07, x='description_bin', y='reviews_count', palette='cividis', ci='sd')
+        plt.title('RQ07: Média de Revisões por Tamanho da Descrição do PR (Foco em 90% dos Dados)', fontsize=16)
+        plt.xlabel('Categoria de Tamanho da Descrição', fontsize=12)
+        plt.ylabel('Média de Revisões (com Desvio Padrão)', fontsize=12)
+        plt.tight_layout()
+        save_figure('rq07_binned_descricao_vs_revisoes.png')
+        print("Gráfico 'rq07_binned_descricao_vs_revisoes.png' salvo.")
+
+
+# --- Gráficos para a RQ08: Relação entre Interações e Número de Revisões ---
+def render_rq08(data):
+    # Filtrar outliers para focar na tendência principal (90%)
+    df_filtered = data.filtered(*RQ08_FILTER, columns=['interaction_participants', 'interaction_comments',
+                                                       'reviews_count'])
+    print(f"\nPara os gráficos da RQ08, focando nos 90% dos dados com menores valores.")
+    draw_rq08(df_filtered)
+
+
+def draw_rq08(df_filtered, weights=None):
+    # `weights`: coluna com o número de PRs de cada linha, quando os dados já vêm contados
+    # por valor (ver shard_stats)
+    with sns.axes_style("whitegrid"):
+        # 1. 2D Histogram (Heatmap): Número de Participantes vs. Número de Revisões
+        plt.figure(figsize=(10, 8))
+        h1 = plt.hist2d(data=df_filtered, x='interaction_participants', y='reviews_count', bins=10, weights=weights, cmap='inferno')
+        plt.colorbar(h1[3], label='Contagem de PRs') # Adiciona a barra de cores
+        plt.title('RQ08: Densidade de PRs por Participantes vs. Revisões (Heatmap)', fontsize=16)
+        plt.xlabel('Número de Participantes', fontsize=12)
+        plt.ylabel('Número de Revisões', fontsize=12)
+        plt.tight_layout()
+        save_figure('rq08_heatmap_participantes_vs_revisoes.png')
+        print("Gráfico 'rq08_heatmap_participantes_vs_revisoes.png' salvo.")
+
+        # 2. 2D Histogram (Heatmap): Número de Comentários vs. Número de Revisões
+        plt.figure(figsize=(10, 8))
+        h2 = plt.hist2d(data=df_filtered, x='interaction_comments', y='reviews_count', bins=15, weights=weights, cmap='inferno')
+        plt.colorbar(h2[3], label='Contagem de PRs')
+        plt.title('RQ08: Densidade de PRs por Comentários vs. Revisões (Heatmap)', fontsize=16)
+        plt.xlabel('Número de Comentários', fontsize=12)
+        plt.ylabel('Número de Revisões', fontsize=12)
+        plt.tight_layout()
+        save_figure('rq08_heatmap_comentarios_vs_revisoes.png')
+        print("Gráfico 'rq08_heatmap_comentarios_vs_revisoes.png' salvo.")
+
+
+# --- Mapa de calor de correlação de Spearman ---
+def render_heatmap(data):
+    # Calcular a matriz de correlação de Spearman das colunas numéricas originais
+    draw_heatmap(data.spearman(NUMERIC_COLUMNS))
+
+
+def draw_heatmap(corr_matrix):
+    # Configurar o plot
+    plt.figure(figsize=(12, 10))
+
+    # Gerar o mapa de calor com a escala de -1 a 1
+    sns.heatmap(
+        corr_matrix,
+        annot=True,
+        cmap='coolwarm',
+        fmt=".2f",
+        linewidths=.5,
+        vmin=-1,  # Define o valor mínimo da escala de cor
+        vmax=1    # Define o valor máximo da escala de cor
+    )
+
+    # Adicionar títulos e ajustar layout
+    plt.title('Mapa de Calor de Correlação de Spearman', fontsize=16)
+    plt.xticks(rotation=45, ha='right')
+    plt.yticks(rotation=0)
+    plt.tight_layout()
+
+    # Salvar a imagem
+    save_figure('heatmap_correlation_scaled.png')
+    print("Mapa de calor salvo como 'heatmap_correlation_scaled.png'")
+
+
+# --- Tabela de medianas por status ---
+def render_table(data):
+    # Exibir os resultados transpostos para facilitar a cópia
+    print("\n### Valores medianos para a Tabela ###")
+    print(in_table_order(data.median_table()).transpose())
+
+
+FIGURES = {
+    'rq01': render_rq01,
+    'rq02': render_rq02,
+    'rq03': render_rq03,
+    'rq05': render_rq05,
+    'rq06': render_rq06,
+    'rq07': render_rq07,
+    'rq08': render_rq08,
+    'heatmap': render_heatmap,
+    'table': render_table,
+}
+# Figuras com modo rápido (agregar e depois desenhar, ver fast_plots)
+FAST_FIGURES = ('rq02', 'rq03', 'rq05', 'rq06')
@@ -0,0 +1,75 @@
+"""Manifesto das figuras já geradas: para cada figura, a chave de entrada (identificador
+do dataset, parâmetros e código dos gráficos) e os arquivos gravados com tamanho e mtime.
+
+Uma figura é pulada quando a chave é a mesma da última geração e os arquivos continuam
+lá sem alteração; basta mudar o dataset, os filtros/parâmetros em figures.py ou
+fast_plots.py, ou apagar/editar um PNG para ela ser gerada de novo.
+"""
+import hashlib
+import json
+import os
+
+import matplotlib
+import seaborn as sns
+
+# --- CONFIGURAÇÕES ---
+MANIFEST_NAME = '.render_manifest.json'
+USE_RENDER_CACHE = os.getenv('RENDER_CACHE', '1') != '0'
+_PLOT_SOURCES = [os.path.join(os.path.dirname(os.path.abspath(__file__)), f) for f in ('figures.py', 'fast_plots.py')]
+
+
+def code_version():
+    """Hash do código dos gráficos (filtros, estilos, modo rápido) e das versões das bibliotecas."""
+    digest = hashlib.blake2b(f"{matplotlib.__version__}:{sns.__version__}".encode(), digest_size=16)
+    for path in _PLOT_SOURCES:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _stat(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class RenderManifest:
+    """Manifesto JSON no diretório de saída das figuras."""
+
+    def __init__(self, output_dir='.'):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+
+    @staticmethod
+    def key(fingerprint, name, params):
+        return hashlib.blake2b(repr((fingerprint, name, params, code_version())).encode(), digest_size=16).hexdigest()
+
+    def is_fresh(self, name, key):
+        """True se a figura foi gerada com a mesma chave e os arquivos não mudaram desde então."""
+        entry = self.entries.get(name)
+        if not entry or entry['key'] != key or not entry['outputs']:
+            return False
+        try:
+            return all(_stat(os.path.join(self.output_dir, f)) == s for f, s in entry['outputs'].items())
+        except FileNotFoundError:
+            return False
+
+    def seconds(self, name):
+        """Duração da última geração da figura (0 se nunca foi gerada)."""
+        return self.entries.get(name, {}).get('seconds', 0)
+
+    def record(self, name, key, outputs, seconds):
+        """Registra a geração da figura; figuras sem arquivos (a tabela) ficam só com a
+        duração e são sempre geradas de novo."""
+        self.entries[name] = {'key': key, 'seconds': round(seconds, 3),
+                              'outputs': {f: _stat(os.path.join(self.output_dir, f)) for f in outputs}}
+
+    def save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
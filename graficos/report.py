@@ -0,0 +1,117 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'códigos'))
+from analysis import BACKEND, BACKENDS, DATASET_PATH, USE_CACHE, open_analysis
+from compute_cache import dataset_fingerprint
+import figures
+from figures import FAST_FIGURES, FIGURES
+from render_cache import USE_RENDER_CACHE, RenderManifest
+
+# --- CONFIGURAÇÕES ---
+# Processos para gerar as figuras (padrão: todos os núcleos)
+JOBS = int(os.getenv('REPORT_JOBS', '0')) or os.cpu_count()
+
+# Dataset compartilhado: carregado uma vez no processo principal e herdado pelos
+# processos filhos (fork), sem nova leitura do arquivo (no DuckDB, cada filho abre a sua
+# conexão e consulta o arquivo em disco)
+_DATA = None
+# Figuras geradas no modo rápido (fast_plots) nesta execução
+_FAST = ()
+
+
+def _render(name):
+    """Gera uma figura e devolve (nome, arquivos gravados, segundos)."""
+    figures.SAVED.clear()
+    started = time.perf_counter()
+    if name in _FAST:
+        FIGURES[name](_DATA, fast=True)
+    else:
+        FIGURES[name](_DATA)
+    return name, list(figures.SAVED), time.perf_counter() - started
+
+
+def run(names=None, path=DATASET_PATH, jobs=JOBS, use_cache=USE_CACHE, fast=(), backend=None,
+        render_cache=USE_RENDER_CACHE):
+    """Carrega o dataset uma única vez e gera as figuras/tabela pedidas (todas por padrão),
+    em até `jobs` processos paralelos. As figuras em `fast` usam o modo rápido;
+    `backend` escolhe entre pandas e DuckDB (ver analysis.open_analysis).
+
+    Com `render_cache`, figuras cujo dataset, parâmetros e código não mudaram desde a
+    última geração (manifesto de render_cache) são puladas, sem carregar o dataset se
+    nenhuma precisar dele."""
+    global _DATA, _FAST
+    names = list(names or FIGURES)
+    _FAST = tuple(fast)
+    try:
+        manifest = RenderManifest()
+        fingerprint = dataset_fingerprint(path)
+        keys = {name: manifest.key(fingerprint, name, name in _FAST) for name in names}
+        if render_cache:
+            fresh = [name for name in names if manifest.is_fresh(name, keys[name])]
+            if fresh:
+                print(f"Figuras sem mudanças desde a última geração (arquivos mantidos): {', '.join(fresh)}")
+            names = [name for name in names if name not in fresh]
+            if not names:
+                return
+        # As mais demoradas na última geração primeiro, para o pool terminar junto
+        names.sort(key=manifest.seconds, reverse=True)
+
+        _DATA = open_analysis(path, use_cache=use_cache, backend=backend)
+        print(f"Dataset carregado com sucesso de '{path}'")
+
+        try:
+            # Os filhos herdam o dataset pelo fork; sem fork (Windows) as figuras são geradas em série
+            if jobs > 1 and len(names) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('fork')
+                with context.Pool(processes=min(jobs, len(names))) as pool:
+                    for name, outputs, seconds in pool.imap_unordered(_render, names):
+                        manifest.record(name, keys[name], outputs, seconds)
+            else:
+                for name in names:
+                    _, outputs, seconds = _render(name)
+                    manifest.record(name, keys[name], outputs, seconds)
+        finally:
+            # Só o processo principal grava o manifesto, com o que já ficou pronto
+            manifest.save()
+
+    except FileNotFoundError:
+        print(f"Erro: O arquivo não foi encontrado no caminho especificado: {path}")
+    except Exception as e:
+        print(f"Ocorreu um erro ao processar o arquivo: {e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera todas as figuras e a tabela das RQs a partir de uma única leitura do dataset.")
+    parser.add_argument('--only', default=None,
+                        help=f"Lista separada por vírgulas entre: {', '.join(FIGURES)} (padrão: todas).")
+    parser.add_argument('--dataset', default=DATASET_PATH, help="Arquivo CSV/Parquet ou diretório de Parquets (ou de CSVs por repositório, com o DuckDB).")
+    parser.add_argument('--jobs', type=int, default=JOBS, help="Processos para gerar as figuras em paralelo (padrão: todos os núcleos).")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Não usa o cache em disco de quantis, filtros e agregados.")
+    parser.add_argument('--force', action='store_true',
+                        help="Gera todas as figuras pedidas mesmo que o manifesto indique que não mudaram.")
+    parser.add_argument('--fast', default='',
+                        help=f"Figuras no modo rápido (agregar e depois desenhar), separadas por vírgulas "
+                             f"entre: {', '.join(FAST_FIGURES)}, ou 'all'.")
+    parser.add_argument('--backend', choices=BACKENDS, default=BACKEND,
+                        help="Motor da análise: DuckDB fora da memória, pandas em memória ou auto (DuckDB se instalado).")
+    args = parser.parse_args(argv)
+
+    names = args.only.split(',') if args.only else None
+    unknown = [n for n in names or [] if n not in FIGURES]
+    if unknown:
+        parser.error(f"Figuras desconhecidas: {', '.join(unknown)}")
+    fast = FAST_FIGURES if args.fast == 'all' else [n for n in args.fast.split(',') if n]
+    unknown = [n for n in fast if n not in FAST_FIGURES]
+    if unknown:
+        parser.error(f"Figuras sem modo rápido: {', '.join(unknown)}")
+    run(names, path=args.dataset, jobs=args.jobs, use_cache=USE_CACHE and not args.no_cache, fast=fast,
+        backend=args.backend, render_cache=USE_RENDER_CACHE and not args.force)
+
+
+if __name__ == "__main__":
+    main()